@@ -1,10 +1,16 @@
 from datetime import datetime, timedelta
 import pytz
+from typing import Optional
 from app.config import USER_TIMEZONE, USER_LATITUDE, USER_LONGITUDE
+from app.deadline import Deadline, stage
 
 class ContextAgent:
-    def gather(self, user_prefs=None):
+    def gather(self, user_prefs=None, deadline: Optional[Deadline] = None):
         """Gather current context for a student in Chennai"""
+        with stage(deadline, "context"):
+            return self._gather(user_prefs)
+
+    def _gather(self, user_prefs=None):
         # Get current time in IST (Asia/Kolkata)
         tz = pytz.timezone(USER_TIMEZONE)
         now = datetime.now(tz)
@@ -1,9 +1,22 @@
 from datetime import datetime
 import pytz
+from typing import Optional
+from app.deadline import Deadline, stage
 
 class ExecutionAgent:
-    def execute(self, food, travel, user_prefs=None):
+    def execute(self, food, travel, user_prefs=None, deadline: Optional[Deadline] = None):
         """Execute the booking for food and travel"""
+        with stage(deadline, "execution") as execution_stage:
+            # Never start a booking the client has already given up waiting for
+            if deadline is not None and deadline.expired():
+                execution_stage.cut("deadline exceeded before booking")
+                return {
+                    "status": "Deferred",
+                    "notes": "Booking not placed: request deadline exceeded"
+                }
+            return self._execute(food, travel, user_prefs)
+
+    def _execute(self, food, travel, user_prefs=None):
         
         # Extract data, handling both dict and object formats
         if hasattr(food, 'restaurant'):
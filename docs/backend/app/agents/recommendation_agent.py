@@ -0,0 +1,148 @@
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from app.agents.risk_agent import RiskAgent, flag_names, option_field
+from app.config import RECOMMEND_DOMINANCE_CHUNK
+from app.deadline import Deadline, stage
+
+# Objectives a user can weight; cost and ETA are minimised, confidence maximised
+OBJECTIVES = ("cost", "eta", "confidence")
+
+
+def _dominated(points: np.ndarray, strict: Sequence[int], chunk: int = RECOMMEND_DOMINANCE_CHUNK) -> np.ndarray:
+    """Mark rows of points (all columns minimised) that another row dominates (used per leg).
+
+    Row j dominates row i when it is no worse in every column and strictly
+    better in at least one of the strict columns. Rows are checked in chunks
+    so memory stays at chunk x len(points) comparisons.
+    """
+    n = len(points)
+    dominated = np.zeros(n, dtype=bool)
+    strict_points = points[:, strict]
+    for start in range(0, n, chunk):
+        block = points[start:start + chunk]
+        no_worse = (points[None, :, :] <= block[:, None, :]).all(axis=2)
+        better = (strict_points[None, :, :] < block[:, None, strict]).any(axis=2)
+        dominated[start:start + chunk] = (no_worse & better).any(axis=1)
+    return dominated
+
+
+def _pareto_front(cost: np.ndarray, eta: np.ndarray, confidence: np.ndarray) -> np.ndarray:
+    """Mask of combinations no other combination beats on cost, ETA and confidence.
+
+    Confidence only takes a handful of values (one per risk flag mask), so
+    each level is swept in cost order against a running minimum ETA instead
+    of comparing every pair: O(levels x n log n) rather than O(n^2).
+    """
+    dominated = np.zeros(len(cost), dtype=bool)
+
+    def min_eta_upto(level_cost: np.ndarray, level_eta: np.ndarray, query_cost: np.ndarray, side: str):
+        """Lowest ETA among level points with cost <= (side="right") or < (side="left") each query cost"""
+        order = np.argsort(level_cost, kind="stable")
+        sorted_cost = level_cost[order]
+        running_min = np.minimum.accumulate(level_eta[order])
+        idx = np.searchsorted(sorted_cost, query_cost, side=side)
+        return np.where(idx > 0, running_min[np.maximum(idx - 1, 0)], np.inf)
+
+    for level in np.unique(confidence):
+        at = np.flatnonzero(confidence == level)
+        above = confidence > level
+        c, e = cost[at], eta[at]
+        # A more confident combination only needs to be no worse on cost and ETA
+        beaten = np.zeros(len(at), dtype=bool)
+        if above.any():
+            beaten |= min_eta_upto(cost[above], eta[above], c, "right") <= e
+        # At the same confidence it must also be strictly better on cost or ETA
+        beaten |= min_eta_upto(c, e, c, "left") <= e
+        beaten |= min_eta_upto(c, e, c, "right") < e
+        dominated[at] = beaten
+    return ~dominated
+
+
+def _number(value: float):
+    """Plain JSON number from a numpy value (ints stay ints)"""
+    value = float(value)
+    return int(value) if value.is_integer() else value
+
+
+class RecommendationAgent:
+    def __init__(self, risk_agent: Optional[RiskAgent] = None):
+        self.risk_agent = risk_agent or RiskAgent()
+
+    def _leg_survivors(self, options: Sequence[Any], cost_field: str, default_eta: float) -> np.ndarray:
+        """Indices of options not beaten by another option of the same leg.
+
+        An option that is no cheaper, no faster and no steadier than another,
+        and worse on cost or ETA, can only form dominated combinations, so it
+        is dropped before the cross product is built.
+        """
+        points = np.array([
+            (option_field(o, cost_field, 0), option_field(o, "eta_minutes", default_eta),
+             option_field(o, "eta_variance", 2))
+            for o in options
+        ], dtype=np.float64).reshape(len(options), 3)
+        return np.flatnonzero(~_dominated(points, strict=(0, 1)))
+
+    def recommend(self, food_options: Sequence[Any], travel_options: Sequence[Any],
+                  context: Dict[str, Any], weights: Optional[Dict[str, float]] = None,
+                  k: int = 5, deadline: Optional[Deadline] = None) -> Dict[str, Any]:
+        """Pareto-optimal food/travel combinations, best k first under the given weights"""
+        with stage(deadline, "recommend"):
+            return self._recommend(food_options, travel_options, context, weights, k)
+
+    def _recommend(self, food_options, travel_options, context, weights, k):
+        weights = {name: float((weights or {}).get(name, 1.0)) for name in OBJECTIVES}
+
+        food_ids = self._leg_survivors(food_options, "price", 30)
+        travel_ids = self._leg_survivors(travel_options, "cost", 15)
+        batch = self.risk_agent.evaluate_batch(
+            [food_options[i] for i in food_ids], [travel_options[j] for j in travel_ids], context
+        )
+
+        cost = batch["total_cost"].ravel()
+        eta = batch["total_eta"].ravel()
+        confidence = batch["confidence"].ravel()
+        frontier = np.flatnonzero(_pareto_front(cost, eta, confidence))
+
+        # Normalise each objective over the frontier so the weights compare like with like
+        def scaled(values: np.ndarray) -> np.ndarray:
+            span = values.max() - values.min() if len(values) else 0
+            return (values - values.min()) / span if span > 0 else np.zeros(len(values))
+
+        score = (
+            weights["cost"] * (1 - scaled(cost[frontier]))
+            + weights["eta"] * (1 - scaled(eta[frontier]))
+            + weights["confidence"] * scaled(confidence[frontier])
+        )
+
+        # Partial sort: only the k best frontier points are ever ordered
+        k = min(k, len(frontier))
+        best = np.argpartition(-score, k - 1)[:k] if k else np.array([], dtype=int)
+        best = best[np.argsort(-score[best], kind="stable")]
+
+        n_travel = len(travel_ids)
+        recommendations: List[Dict[str, Any]] = []
+        for rank, pick in enumerate(best, start=1):
+            flat = frontier[pick]
+            row, col = divmod(int(flat), n_travel)
+            recommendations.append({
+                "rank": rank,
+                "food_id": int(food_ids[row]),
+                "travel_id": int(travel_ids[col]),
+                "total_cost": _number(cost[flat]),
+                "total_eta": _number(eta[flat]),
+                "confidence": float(confidence[flat]),
+                "on_time_probability": round(float(batch["on_time_probability"][row, col]), 4),
+                "buffer_minutes": _number(batch["buffer_minutes"][row, col]),
+                "risks": flag_names(int(batch["flags"][row, col])),
+                "score": round(float(score[pick]), 4)
+            })
+
+        return {
+            "weights": weights,
+            "combinations": len(food_options) * len(travel_options),
+            "evaluated": int(cost.size),
+            "frontier_size": int(len(frontier)),
+            "recommendations": recommendations
+        }
@@ -1,11 +1,149 @@
+import math
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional, Sequence
+
+import numpy as np
+
+from app.config import RISK_MEMO_SIZE, RISK_MEMO_BUCKET_MINUTES
+from app.deadline import Deadline, stage
+
+# Confidence deductions, in the order evaluate() applies them; bit i of a batch flag mask is RISK_FLAGS[i]
+RISK_FLAGS = ("buffer_risk", "food_risk", "travel_risk", "food_variance_risk", "travel_variance_risk")
+RISK_DEDUCTIONS = {
+    "buffer_risk": 0.35,
+    "food_risk": 0.2,
+    "travel_risk": 0.2,
+    "food_variance_risk": 0.15,
+    "travel_variance_risk": 0.1
+}
+FOOD_VARIANCE_LIMIT = 5
+TRAVEL_VARIANCE_LIMIT = 4
+SAFE_CONFIDENCE = 0.6
+
+
+def option_field(option, name: str, default):
+    """Read a field from a quote object or a dict"""
+    return getattr(option, name) if hasattr(option, name) else option.get(name, default)
+
+
+def on_time_probability(buffer: float, variance: float) -> float:
+    """P(arriving before class) with the food and travel legs as independent normals.
+
+    buffer is minutes until class minus the summed mean ETAs and variance the
+    summed eta_variance, so this is the normal CDF at buffer / sqrt(variance).
+    With no variance the arrival time is certain.
+    """
+    if variance <= 0:
+        return 1.0 if buffer >= 0 else 0.0
+    return 0.5 * (1.0 + math.erf(buffer / math.sqrt(2.0 * variance)))
+
+
+_erf = np.frompyfunc(math.erf, 1, 1)
+
+
+def on_time_probability_batch(buffer: np.ndarray, variance: np.ndarray) -> np.ndarray:
+    """Vectorized on_time_probability(); uses the same math.erf, so results match it exactly"""
+    buffer, variance = np.broadcast_arrays(buffer, variance)
+    certain = variance <= 0
+    z = np.divide(buffer, np.sqrt(2.0 * variance, where=~certain, out=np.ones(buffer.shape)),
+                  where=~certain, out=np.zeros(buffer.shape))
+    probability = 0.5 * (1.0 + _erf(z).astype(np.float64))
+    return np.where(certain, (buffer >= 0).astype(np.float64), probability)
+
+
+def flag_names(mask: int) -> List[str]:
+    """The risk reasons set in a batch flag mask"""
+    return [name for bit, name in enumerate(RISK_FLAGS) if mask & (1 << bit)]
+
+
+class RiskMemo:
+    """Bounded LRU of evaluate() results"""
+
+    def __init__(self, max_entries: int = RISK_MEMO_SIZE):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            result = self._entries.get(key)
+            if result is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return result
+
+    def put(self, key: Hashable, result: Dict[str, Any]) -> None:
+        with self._lock:
+            self._entries[key] = result
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.max_entries > 0,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries
+            }
+
+
 class RiskAgent:
-    def __init__(self, min_buffer=15, max_food_eta=30, max_travel_eta=20):
+    def __init__(self, min_buffer=15, max_food_eta=30, max_travel_eta=20,
+                 memo_size: int = RISK_MEMO_SIZE, bucket_minutes: float = RISK_MEMO_BUCKET_MINUTES):
         self.min_buffer = min_buffer
         self.max_food_eta = max_food_eta
         self.max_travel_eta = max_travel_eta
+        self._confidence_by_flags = self._confidence_table()
+        # Whole-minute buckets keep minutes (and so buffer_minutes) integral
+        self.bucket_minutes = int(bucket_minutes) if float(bucket_minutes).is_integer() else bucket_minutes
+        self.memo = RiskMemo(memo_size)
     
-    def evaluate(self, food, travel, context):
+    def evaluate(self, food, travel, context, deadline: Optional[Deadline] = None):
         """Evaluate risk of the proposed plan"""
+        with stage(deadline, "risk"):
+            if self.memo.max_entries <= 0:
+                return self._evaluate(food, travel, context)
+            return self._evaluate_memoized(food, travel, context)
+
+    def _evaluate_memoized(self, food, travel, context):
+        """evaluate() through the memo, keyed on the fields it reads and the minute bucket.
+
+        Everyone in a bucket is scored at its lower edge, so a shared result
+        never promises more time than the caller has.
+        """
+        minutes = context.get("minutes_until_class", 60)
+        if self.bucket_minutes > 0:
+            minutes = math.floor(minutes / self.bucket_minutes) * self.bucket_minutes
+        key = (
+            option_field(food, "eta_minutes", 30), option_field(food, "eta_variance", 2),
+            option_field(travel, "eta_minutes", 15), option_field(travel, "eta_variance", 2),
+            minutes
+        )
+        result = self.memo.get(key)
+        if result is None:
+            result = self._evaluate(food, travel, {"minutes_until_class": minutes})
+            self.memo.put(key, result)
+        # Callers get their own copy to mutate
+        return {**result, "reasoning": dict(result["reasoning"])}
+
+    def _evaluate(self, food, travel, context):
         
         # Extract eta values, handling both dict and object formats
         food_eta = food.eta_minutes if hasattr(food, 'eta_minutes') else food.get("eta_minutes", 30)
@@ -29,23 +167,23 @@ class RiskAgent:
         
         # Deductions based on constraints
         if buffer < self.min_buffer:
-            confidence -= 0.35
+            confidence -= RISK_DEDUCTIONS["buffer_risk"]
             reasoning["buffer_risk"] = f"Buffer is {buffer} minutes, minimum required is {self.min_buffer}"
         
         if food_eta > self.max_food_eta:
-            confidence -= 0.2
+            confidence -= RISK_DEDUCTIONS["food_risk"]
             reasoning["food_risk"] = f"Food ETA {food_eta} exceeds max {self.max_food_eta}"
         
         if travel_eta > self.max_travel_eta:
-            confidence -= 0.2
+            confidence -= RISK_DEDUCTIONS["travel_risk"]
             reasoning["travel_risk"] = f"Travel ETA {travel_eta} exceeds max {self.max_travel_eta}"
         
-        if food_variance > 5:
-            confidence -= 0.15
+        if food_variance > FOOD_VARIANCE_LIMIT:
+            confidence -= RISK_DEDUCTIONS["food_variance_risk"]
             reasoning["food_variance_risk"] = f"Food delivery has high variance {food_variance}"
         
-        if travel_variance > 4:
-            confidence -= 0.1
+        if travel_variance > TRAVEL_VARIANCE_LIMIT:
+            confidence -= RISK_DEDUCTIONS["travel_variance_risk"]
             reasoning["travel_variance_risk"] = f"Travel has variance {travel_variance}"
         
         # Ensure confidence is between 0 and 1
@@ -53,8 +191,57 @@ class RiskAgent:
         
         return {
             "confidence": round(confidence, 2),
+            "on_time_probability": on_time_probability(buffer, food_variance + travel_variance),
             "buffer_minutes": max(0, buffer),
             "reasoning": reasoning,
-            "recommendation": "Safe to execute" if confidence >= 0.6 else "Needs user approval"
+            "recommendation": "Safe to execute" if confidence >= SAFE_CONFIDENCE else "Needs user approval"
+        }
+
+    def _confidence_table(self) -> np.ndarray:
+        """Rounded confidence for every flag mask, computed with the same float steps as evaluate()"""
+        table = np.empty(1 << len(RISK_FLAGS))
+        for mask in range(len(table)):
+            confidence = 1.0
+            for name in flag_names(mask):
+                confidence -= RISK_DEDUCTIONS[name]
+            table[mask] = round(max(0.0, min(1.0, confidence)), 2)
+        return table
+
+    def evaluate_batch(self, food_options: Sequence[Any], travel_options: Sequence[Any],
+                       context: Dict[str, Any]) -> Dict[str, np.ndarray]:
+        """Evaluate every food x travel pair at once.
+
+        Returns (len(food_options), len(travel_options)) arrays; entry [i, j]
+        matches evaluate(food_options[i], travel_options[j], context) exactly.
+        "flags" is a bitmask over RISK_FLAGS (see flag_names()), and
+        "on_time_probability" the normal-model chance of making it to class.
+        """
+        food_eta = np.array([option_field(f, "eta_minutes", 30) for f in food_options], dtype=np.float64)
+        food_variance = np.array([option_field(f, "eta_variance", 2) for f in food_options], dtype=np.float64)
+        food_cost = np.array([option_field(f, "price", 0) for f in food_options], dtype=np.float64)
+        travel_eta = np.array([option_field(t, "eta_minutes", 15) for t in travel_options], dtype=np.float64)
+        travel_variance = np.array([option_field(t, "eta_variance", 2) for t in travel_options], dtype=np.float64)
+        travel_cost = np.array([option_field(t, "cost", 0) for t in travel_options], dtype=np.float64)
+
+        total_eta = food_eta[:, None] + travel_eta[None, :]
+        buffer = context.get("minutes_until_class", 60) - total_eta
+
+        # Per-leg flags are computed once per option and broadcast over the other leg
+        food_flags = ((food_eta > self.max_food_eta).astype(np.uint8) << 1) \
+            | ((food_variance > FOOD_VARIANCE_LIMIT).astype(np.uint8) << 3)
+        travel_flags = ((travel_eta > self.max_travel_eta).astype(np.uint8) << 2) \
+            | ((travel_variance > TRAVEL_VARIANCE_LIMIT).astype(np.uint8) << 4)
+        flags = (buffer < self.min_buffer).astype(np.uint8) | food_flags[:, None] | travel_flags[None, :]
+
+        confidence = self._confidence_by_flags[flags]
+        variance = food_variance[:, None] + travel_variance[None, :]
+        return {
+            "confidence": confidence,
+            "on_time_probability": on_time_probability_batch(buffer, variance),
+            "buffer_minutes": np.maximum(buffer, 0),
+            "total_eta": total_eta,
+            "total_cost": food_cost[:, None] + travel_cost[None, :],
+            "flags": flags,
+            "safe": confidence >= SAFE_CONFIDENCE
         }
 
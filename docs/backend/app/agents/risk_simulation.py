@@ -0,0 +1,161 @@
+"""
+Monte Carlo risk simulation
+Draws arrival times for the food and travel legs and measures how often a
+food/travel combination makes it to class. Unlike the closed-form normal
+model in risk_agent, this handles skewed delays: a late delivery can run
+far past its quote, an early one cannot arrive before it was cooked.
+
+Leg delays are pluggable: anything with sample(rng, mean, variance, n)
+works. Each option draws from its own generator seeded by (seed, leg, option
+index), so results are reproducible and do not depend on how the
+combinations are chunked, and combinations sharing an option share its draws.
+"""
+
+import math
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.agents.risk_agent import option_field
+from app.config import RISK_SIM_SAMPLES, RISK_SIM_SEED, RISK_SIM_CHUNK_ELEMENTS, RISK_SIM_MIN_HISTORY
+
+FOOD_LEG = 0
+TRAVEL_LEG = 1
+ARRIVAL_QUANTILES = (50, 90, 99)
+Z_95 = 1.959964  # two-sided 95% normal quantile
+
+
+class LognormalDelay:
+    """Lognormal leg time with the quote's mean and variance (moment-matched), skewed late"""
+    name = "lognormal"
+
+    def sample(self, rng: np.random.Generator, mean: float, variance: float, n: int) -> np.ndarray:
+        if mean <= 0 or variance <= 0:
+            return np.full(n, max(mean, 0.0))
+        sigma2 = math.log1p(variance / (mean * mean))
+        mu = math.log(mean) - sigma2 / 2
+        return np.exp(mu + math.sqrt(sigma2) * rng.standard_normal(n))
+
+
+class EmpiricalDelay:
+    """Leg time resampled from observed actual/quoted ETA ratios, scaled to each quote"""
+    name = "empirical"
+
+    def __init__(self, ratios: Iterable[float]):
+        self.ratios = np.asarray([r for r in ratios if r > 0], dtype=np.float64)
+        if not len(self.ratios):
+            raise ValueError("EmpiricalDelay needs at least one positive ratio")
+
+    @classmethod
+    def from_history(cls, records: Sequence[Dict[str, Any]], leg: str,
+                     min_samples: int = RISK_SIM_MIN_HISTORY) -> Optional["EmpiricalDelay"]:
+        """Ratios from execution records whose leg ("food" or "travel") has actual_eta_minutes.
+
+        Returns None when fewer than min_samples records carry an actual time.
+        """
+        ratios = []
+        for record in records:
+            quote = record.get(leg) if isinstance(record, dict) else None
+            if not isinstance(quote, dict):
+                continue
+            quoted, actual = quote.get("eta_minutes"), quote.get("actual_eta_minutes")
+            if quoted and actual is not None and quoted > 0 and actual > 0:
+                ratios.append(actual / quoted)
+        return cls(ratios) if len(ratios) >= min_samples else None
+
+    def sample(self, rng: np.random.Generator, mean: float, variance: float, n: int) -> np.ndarray:
+        return mean * rng.choice(self.ratios, size=n)
+
+
+def _wilson_interval(successes: np.ndarray, n: int, z: float = Z_95) -> Tuple[np.ndarray, np.ndarray]:
+    """Wilson score interval for a binomial proportion (well behaved near 0 and 1)"""
+    p = successes / n
+    denominator = 1 + z * z / n
+    centre = (p + z * z / (2 * n)) / denominator
+    half = z * np.sqrt(p * (1 - p) / n + z * z / (4 * n * n)) / denominator
+    return np.clip(centre - half, 0, 1), np.clip(centre + half, 0, 1)
+
+
+class RiskSimulator:
+    def __init__(self, samples: int = RISK_SIM_SAMPLES, seed: Optional[int] = RISK_SIM_SEED,
+                 food_delay=None, travel_delay=None, chunk_elements: int = RISK_SIM_CHUNK_ELEMENTS):
+        if samples < 1:
+            raise ValueError("samples must be positive")
+        self.samples = samples
+        self.seed = seed
+        self.food_delay = food_delay or LognormalDelay()
+        self.travel_delay = travel_delay or LognormalDelay()
+        self.chunk_elements = chunk_elements
+
+    def _leg_samples(self, leg: int, options: Sequence[Any], indices: np.ndarray,
+                     delay, default_eta: float) -> np.ndarray:
+        """(len(indices), samples) leg times, one reproducible stream per option"""
+        out = np.empty((len(indices), self.samples))
+        for row, index in enumerate(indices):
+            option = options[index]
+            rng = np.random.default_rng(None if self.seed is None else [self.seed, leg, int(index)])
+            out[row] = delay.sample(
+                rng,
+                float(option_field(option, "eta_minutes", default_eta)),
+                float(option_field(option, "eta_variance", 2)),
+                self.samples
+            )
+        return out
+
+    def simulate(self, food_options: Sequence[Any], travel_options: Sequence[Any],
+                 minutes_until_class: float,
+                 pairs: Optional[Sequence[Tuple[int, int]]] = None) -> Dict[str, np.ndarray]:
+        """Simulate each (food index, travel index) pair (default: every combination).
+
+        Returns arrays with one entry per pair: on_time_probability, its 95%
+        confidence interval (ci_low, ci_high), and slack_p50/p90/p99 - the
+        minutes to spare when arrival lands on its 50th/90th/99th percentile
+        (negative means late).
+        """
+        if pairs is None:
+            pairs = [(i, j) for i in range(len(food_options)) for j in range(len(travel_options))]
+        pairs = np.asarray(pairs, dtype=np.int64).reshape(-1, 2)
+        n_pairs = len(pairs)
+
+        on_time = np.empty(n_pairs)
+        slack = {q: np.empty(n_pairs) for q in ARRIVAL_QUANTILES}
+        # Slack at arrival percentile q is the (100 - q)th percentile of slack
+        slack_percentiles = [100 - q for q in ARRIVAL_QUANTILES]
+
+        chunk = max(1, self.chunk_elements // self.samples)
+        for start in range(0, n_pairs, chunk):
+            block = pairs[start:start + chunk]
+            food_ids, food_rows = np.unique(block[:, 0], return_inverse=True)
+            travel_ids, travel_rows = np.unique(block[:, 1], return_inverse=True)
+            food_times = self._leg_samples(FOOD_LEG, food_options, food_ids, self.food_delay, 30)
+            travel_times = self._leg_samples(TRAVEL_LEG, travel_options, travel_ids, self.travel_delay, 15)
+
+            block_slack = minutes_until_class - food_times[food_rows] - travel_times[travel_rows]
+            on_time[start:start + len(block)] = (block_slack >= 0).mean(axis=1)
+            values = np.percentile(block_slack, slack_percentiles, axis=1)
+            for q, row in zip(ARRIVAL_QUANTILES, values):
+                slack[q][start:start + len(block)] = row
+
+        ci_low, ci_high = _wilson_interval(on_time * self.samples, self.samples)
+        return {
+            "pairs": pairs,
+            "on_time_probability": on_time,
+            "ci_low": ci_low,
+            "ci_high": ci_high,
+            **{f"slack_p{q}": slack[q] for q in ARRIVAL_QUANTILES}
+        }
+
+    def describe(self, result: Dict[str, np.ndarray]) -> List[Dict[str, Any]]:
+        """simulate() output as one JSON-friendly dict per pair"""
+        return [
+            {
+                "food_id": int(food_id),
+                "travel_id": int(travel_id),
+                "on_time_probability": round(float(result["on_time_probability"][k]), 4),
+                "confidence_interval": [
+                    round(float(result["ci_low"][k]), 4), round(float(result["ci_high"][k]), 4)
+                ],
+                **{f"slack_p{q}": round(float(result[f"slack_p{q}"][k]), 2) for q in ARRIVAL_QUANTILES}
+            }
+            for k, (food_id, travel_id) in enumerate(result["pairs"])
+        ]
@@ -30,3 +30,111 @@ MIN_BUFFER_TIME = 15  # minutes before class
 
 # Use mock services if real APIs are not available
 USE_MOCK_SERVICES = not (ZOMATO_API_KEY and SWIGGY_API_KEY and UBER_API_KEY)
+
+# Provider stand-in (scripts/provider_standin.py): send every provider call to a
+# local server instead of the real APIs, with placeholder keys where none are set
+PROVIDER_STANDIN_URL = os.getenv("PROVIDER_STANDIN_URL", "").rstrip("/")
+if PROVIDER_STANDIN_URL:
+    ZOMATO_API_KEY = ZOMATO_API_KEY or "standin"
+    SWIGGY_API_KEY = SWIGGY_API_KEY or "standin"
+    UBER_API_KEY = UBER_API_KEY or "standin"
+    OLA_API_KEY = OLA_API_KEY or "standin"
+    USE_MOCK_SERVICES = False
+
+ZOMATO_API_BASE = PROVIDER_STANDIN_URL or "https://api.zomato.com"
+OLA_API_BASE = PROVIDER_STANDIN_URL or "https://api.olarides.com"
+UBER_API_BASE = PROVIDER_STANDIN_URL or "https://api.uber.com"
+
+# Memory Store Configuration
+# "json" keeps everything in agent_memory.json (handy for dev), "sqlite" uses a WAL-mode database
+MEMORY_BACKEND = os.getenv("MEMORY_BACKEND", "json").lower()
+MEMORY_DB_URL = os.getenv("MEMORY_DB_URL", "")  # defaults to agent_memory.db next to agent_memory.json
+HISTORY_RETENTION = int(os.getenv("HISTORY_RETENTION", "50"))  # records kept in the execution journal
+HISTORY_COMPACT_EVERY = int(os.getenv("HISTORY_COMPACT_EVERY", "50"))  # appends between compactions
+HISTORY_SEGMENT_PERIOD = os.getenv("HISTORY_SEGMENT_PERIOD", "day").lower()  # "day" or "week" archive segments
+
+# Write-behind execution logging: queue records in memory and commit them in batches
+MEMORY_WRITE_BEHIND = os.getenv("MEMORY_WRITE_BEHIND", "false").lower() in ("1", "true", "yes")
+MEMORY_FLUSH_INTERVAL = float(os.getenv("MEMORY_FLUSH_INTERVAL", "0.5"))  # seconds
+MEMORY_FLUSH_BATCH_SIZE = int(os.getenv("MEMORY_FLUSH_BATCH_SIZE", "100"))
+MEMORY_FSYNC = os.getenv("MEMORY_FSYNC", "never").lower()  # "always" fsyncs the journal on every commit
+
+# Per-user memory shards: how many users' stores stay loaded at once
+MEMORY_SHARD_CACHE_SIZE = int(os.getenv("MEMORY_SHARD_CACHE_SIZE", "128"))
+MEMORY_IO_WORKERS = int(os.getenv("MEMORY_IO_WORKERS", "4"))  # threads doing memory file/database I/O
+MEMORY_IO_QUEUE_LIMIT = int(os.getenv("MEMORY_IO_QUEUE_LIMIT", "256"))  # memory calls waiting for a thread
+
+# Provider HTTP client: one keep-alive connection pool per provider host
+PROVIDER_POOL_SIZE = int(os.getenv("PROVIDER_POOL_SIZE", "10"))  # connections kept open per host
+PROVIDER_POOL_HOSTS = int(os.getenv("PROVIDER_POOL_HOSTS", "10"))  # host pools kept before the oldest is dropped
+PROVIDER_CONNECT_TIMEOUT = float(os.getenv("PROVIDER_CONNECT_TIMEOUT", "3.05"))  # seconds
+PROVIDER_READ_TIMEOUT = float(os.getenv("PROVIDER_READ_TIMEOUT", "5"))  # seconds, quotes and estimates
+PROVIDER_BOOKING_TIMEOUT = float(os.getenv("PROVIDER_BOOKING_TIMEOUT", "10"))  # seconds, ride bookings
+PROVIDER_FANOUT_DEADLINE = float(os.getenv("PROVIDER_FANOUT_DEADLINE", "4"))  # seconds to wait for all providers before using what arrived
+
+# Provider quote cache: menus change slowly, ride prices surge quickly
+QUOTE_CACHE_TTLS = {
+    "zomato": float(os.getenv("QUOTE_CACHE_TTL_ZOMATO", "300")),  # seconds
+    "uber": float(os.getenv("QUOTE_CACHE_TTL_UBER", "30")),
+    "ola": float(os.getenv("QUOTE_CACHE_TTL_OLA", "30")),
+}
+QUOTE_CACHE_DEFAULT_TTL = float(os.getenv("QUOTE_CACHE_DEFAULT_TTL", "60"))
+QUOTE_CACHE_STALE_SECONDS = float(os.getenv("QUOTE_CACHE_STALE_SECONDS", "60"))  # extra time an expired quote may be served while refreshing
+QUOTE_CACHE_MAX_ENTRIES = int(os.getenv("QUOTE_CACHE_MAX_ENTRIES", "1024"))
+QUOTE_CACHE_COORD_PRECISION = int(os.getenv("QUOTE_CACHE_COORD_PRECISION", "3"))  # decimal places, 3 is ~110 m
+
+# Provider circuit breakers: stop waiting out timeouts on a provider that is down
+CIRCUIT_FAILURE_RATE = float(os.getenv("CIRCUIT_FAILURE_RATE", "0.5"))  # fraction of failed calls that opens the circuit
+CIRCUIT_WINDOW_SIZE = int(os.getenv("CIRCUIT_WINDOW_SIZE", "20"))  # most recent calls considered
+CIRCUIT_WINDOW_SECONDS = float(os.getenv("CIRCUIT_WINDOW_SECONDS", "60"))  # and only those this recent
+CIRCUIT_MIN_CALLS = int(os.getenv("CIRCUIT_MIN_CALLS", "5"))  # calls needed before the rate is trusted
+CIRCUIT_OPEN_SECONDS = float(os.getenv("CIRCUIT_OPEN_SECONDS", "30"))  # fail fast this long before a trial call
+CIRCUIT_HALF_OPEN_CALLS = int(os.getenv("CIRCUIT_HALF_OPEN_CALLS", "1"))  # trial calls that must succeed to close
+
+# Request deadline: overall budget for /api/plan and /api/book
+REQUEST_DEADLINE_MS = float(os.getenv("REQUEST_DEADLINE_MS", "8000"))  # used when the client sends none
+REQUEST_DEADLINE_MAX_MS = float(os.getenv("REQUEST_DEADLINE_MAX_MS", "30000"))  # clients cannot ask for more
+
+# Provider registry: modules that register providers, and per-provider modes
+PROVIDER_MODULES = [
+    m.strip() for m in os.getenv(
+        "PROVIDER_MODULES", "app.tools.food_service_mock,app.tools.travel_service_mock"
+    ).split(",") if m.strip()
+]
+PROVIDER_MODES = {
+    name.strip().lower(): mode.strip().lower()
+    for name, _, mode in (
+        item.partition("=") for item in os.getenv("PROVIDER_MODES", "").split(",") if "=" in item
+    )
+}  # e.g. "zomato=real,ola=mock,uber=off"; unlisted providers are "auto"
+
+# Provider rate limits: one token bucket per API key, shared by every worker process
+PROVIDER_RATE_LIMITS = {
+    "zomato": float(os.getenv("RATE_LIMIT_ZOMATO_PER_MIN", "60")),  # requests per minute
+    "uber": float(os.getenv("RATE_LIMIT_UBER_PER_MIN", "120")),
+    "ola": float(os.getenv("RATE_LIMIT_OLA_PER_MIN", "120")),
+    "default": float(os.getenv("RATE_LIMIT_DEFAULT_PER_MIN", "60")),
+    # Bookings and lookups get buckets of their own so a burst of quotes cannot starve them
+    "ola-booking": float(os.getenv("RATE_LIMIT_OLA_BOOKING_PER_MIN", "30")),
+    "uber-booking": float(os.getenv("RATE_LIMIT_UBER_BOOKING_PER_MIN", "30")),
+    "zomato-lookup": float(os.getenv("RATE_LIMIT_ZOMATO_LOOKUP_PER_MIN", "30")),
+}
+PROVIDER_RATE_BURST = int(os.getenv("RATE_LIMIT_BURST", "10"))  # requests allowed back to back after a quiet spell
+RATE_LIMIT_MAX_WAIT = float(os.getenv("RATE_LIMIT_MAX_WAIT", "0.25"))  # seconds a call may queue for a token
+RATE_LIMIT_DIR = os.getenv("RATE_LIMIT_DIR", "")  # bucket state files, defaults to agent_ratelimits/ next to agent_memory.json
+QUOTE_CACHE_THROTTLED_MAX_AGE = float(os.getenv("QUOTE_CACHE_THROTTLED_MAX_AGE", "600"))  # oldest quote served when a provider is throttled
+
+# Combo recommendations (/api/plan/recommend)
+RECOMMEND_TOP_K = int(os.getenv("RECOMMEND_TOP_K", "5"))  # combinations returned when the client does not say
+RECOMMEND_MAX_K = int(os.getenv("RECOMMEND_MAX_K", "50"))
+RECOMMEND_DOMINANCE_CHUNK = int(os.getenv("RECOMMEND_DOMINANCE_CHUNK", "512"))  # rows compared at once in the Pareto check
+
+# Monte Carlo risk simulation (app.agents.risk_simulation)
+RISK_SIM_SAMPLES = int(os.getenv("RISK_SIM_SAMPLES", "20000"))  # draws per leg
+RISK_SIM_SEED = int(os.getenv("RISK_SIM_SEED", "0"))  # same seed, same results
+RISK_SIM_CHUNK_ELEMENTS = int(os.getenv("RISK_SIM_CHUNK_ELEMENTS", "2000000"))  # combinations x samples simulated at once
+RISK_SIM_MIN_HISTORY = int(os.getenv("RISK_SIM_MIN_HISTORY", "20"))  # records with actual times needed for an empirical delay
+
+# Risk evaluation memo: the same quotes are scored again and again across users
+RISK_MEMO_SIZE = int(os.getenv("RISK_MEMO_SIZE", "4096"))  # results kept, 0 disables the memo
+RISK_MEMO_BUCKET_MINUTES = float(os.getenv("RISK_MEMO_BUCKET_MINUTES", "1"))  # minutes_until_class sharing one result
@@ -0,0 +1,109 @@
+"""
+Request deadline budget
+One Deadline is created per request (from the X-Request-Deadline-Ms header or
+the deadline_ms query param) and passed down the pipeline. Each stage records
+how much budget it was given and whether it had to cut its work short.
+"""
+
+import math
+import time
+from typing import Any, Dict, List, Optional
+
+from app.config import REQUEST_DEADLINE_MS, REQUEST_DEADLINE_MAX_MS
+
+DEADLINE_HEADER = "X-Request-Deadline-Ms"
+
+
+class _Stage:
+    __slots__ = ("name", "budget_ms", "started", "cut_short", "note")
+
+    def __init__(self, name: str, budget_ms: Optional[float]):
+        self.name = name
+        self.budget_ms = budget_ms
+        self.started = time.monotonic()
+        self.cut_short = False
+        self.note = None
+
+    def cut(self, note: str) -> None:
+        """Mark this stage as having skipped or truncated work"""
+        self.cut_short = True
+        self.note = note
+
+    def __enter__(self) -> "_Stage":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        return None
+
+
+class _RecordedStage(_Stage):
+    __slots__ = ("deadline",)
+
+    def __init__(self, deadline: "Deadline", name: str):
+        super().__init__(name, round(deadline.remaining() * 1000, 1))
+        self.deadline = deadline
+
+    def __exit__(self, *exc) -> None:
+        self.deadline._stages.append({
+            "stage": self.name,
+            "budget_ms": self.budget_ms,
+            "elapsed_ms": round((time.monotonic() - self.started) * 1000, 1),
+            "cut_short": self.cut_short,
+            **({"note": self.note} if self.note else {})
+        })
+
+
+class Deadline:
+    def __init__(self, budget_ms: float):
+        self.budget_ms = budget_ms
+        self.started = time.monotonic()
+        self.expires_at = self.started + budget_ms / 1000
+        self._stages: List[Dict[str, Any]] = []
+
+    @classmethod
+    def from_request(cls, header_value: Optional[str] = None, query_value: Optional[float] = None) -> "Deadline":
+        """Build the budget for a request; the header wins over the query param"""
+        raw = header_value if header_value not in (None, "") else query_value
+        if raw in (None, ""):
+            budget_ms = REQUEST_DEADLINE_MS
+        else:
+            try:
+                budget_ms = float(raw)
+            except (TypeError, ValueError):
+                raise ValueError(f"Invalid deadline: {raw!r}")
+            # nan would slip past a plain comparison and poison every timeout
+            if not math.isfinite(budget_ms) or budget_ms <= 0:
+                raise ValueError(f"Invalid deadline: {raw!r}")
+        return cls(min(budget_ms, REQUEST_DEADLINE_MAX_MS))
+
+    def remaining(self) -> float:
+        """Seconds left, never negative"""
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self) -> bool:
+        return time.monotonic() >= self.expires_at
+
+    def timeout(self, cap: float) -> float:
+        """A per-call timeout that never outlives the request"""
+        return min(cap, self.remaining())
+
+    def stage(self, name: str) -> _Stage:
+        return _RecordedStage(self, name)
+
+    def report(self) -> Dict[str, Any]:
+        elapsed = time.monotonic() - self.started
+        return {
+            "budget_ms": self.budget_ms,
+            "elapsed_ms": round(elapsed * 1000, 1),
+            "remaining_ms": round(self.remaining() * 1000, 1),
+            "exceeded": self.expired(),
+            "stages": list(self._stages),
+            "cut_short": [s["stage"] for s in self._stages if s["cut_short"]]
+        }
+
+
+def stage(deadline: Optional[Deadline], name: str) -> _Stage:
+    """Stage tracker for an optional deadline (a no-op tracker when there is none)"""
+    if deadline is None:
+        return _Stage(name, None)
+    return deadline.stage(name)
@@ -1,7 +1,8 @@
-from fastapi import FastAPI, HTTPException, Query
+from fastapi import FastAPI, HTTPException, Query, Header
 from fastapi.responses import HTMLResponse, JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from datetime import datetime, timedelta
+from typing import Optional
 import pytz
 import math
 
@@ -9,12 +10,21 @@ from app.state_machine import AgentState
 from app.agents.content_agent import ContextAgent
 from app.agents.planning_agent import PlanningAgent
 from app.agents.risk_agent import RiskAgent
+from app.agents.recommendation_agent import RecommendationAgent
 from app.agents.execution_agent import ExecutionAgent
 from app.agents.schedule_agent import ScheduleAgent
-from app.memory.store import MemoryStore
-from app.tools.food_service_mock import get_all_food_options
-from app.tools.travel_service_mock import get_all_travel_options
-from app.config import CONFIDENCE_THRESHOLD
+from app.memory.store import create_memory_store
+from app.memory.sharded import validate_user_id
+from app.memory.async_store import AsyncMemoryStore
+from app.tools import http_client
+from app.tools.fanout import fetch_all_options
+from app.tools.providers import FOOD, TRAVEL, describe_providers
+from app.tools.quote_cache import quote_cache
+from app.tools.circuit_breaker import get_breaker_stats
+from app.tools.rate_limiter import get_limiter_stats
+from app.config import CONFIDENCE_THRESHOLD, RECOMMEND_TOP_K, RECOMMEND_MAX_K
+from app.models import serialize_option, serialize_options
+from app.deadline import Deadline
 
 app = FastAPI(
     title="Daily Routine Planner",
@@ -42,17 +52,35 @@ CHENNAI_DESTINATIONS = {
     "OMR Tech Park": {"lat": 12.8397, "lon": 80.2318, "distance": 15},
 }
 
+# Option fields returned by each endpoint (the option lists add an "id")
+PLAN_FOOD_FIELDS = ("restaurant", "item", "price", "eta_minutes", "rating", "service")
+PLAN_TRAVEL_FIELDS = ("service", "mode", "cost", "eta_minutes", "rating")
+BOOKED_FOOD_FIELDS = ("restaurant", "item", "price", "eta_minutes", "service")
+BOOKED_TRAVEL_FIELDS = ("service", "mode", "cost", "eta_minutes")
+
 # Agents
 context_agent = ContextAgent()
 planning_agent = PlanningAgent()
 risk_agent = RiskAgent()
+recommendation_agent = RecommendationAgent(risk_agent)
 execution_agent = ExecutionAgent()
 schedule_agent = ScheduleAgent()
-memory = MemoryStore()
+memory = AsyncMemoryStore(create_memory_store())
 
 # Track selections
 selected_selections = {}
 
+@app.on_event("shutdown")
+async def close_memory():
+    """Drain queued execution records before the worker exits"""
+    await memory.close()
+
+
+@app.on_event("shutdown")
+async def close_provider_sessions():
+    """Close pooled provider connections"""
+    await http_client.close_async_session()
+
 @app.get("/", response_class=HTMLResponse)
 def serve_dashboard():
     return get_dashboard_html()
@@ -66,87 +94,82 @@ def get_destinations():
     }
 
 @app.get("/api/food-options")
-def get_food_options_api(budget: int = Query(200)):
+async def get_food_options_api(budget: int = Query(200)):
     """Get available food options"""
-    options = get_all_food_options(budget)
+    options = (await fetch_all_options(budget, kinds=(FOOD,)))["food_options"]
     return {
-        "options": [
-            {
-                "id": i,
-                "restaurant": opt.restaurant,
-                "item": opt.item,
-                "price": opt.price,
-                "eta_minutes": opt.eta_minutes,
-                "eta_variance": opt.eta_variance,
-                "rating": opt.rating,
-                "service": opt.service
-            } for i, opt in enumerate(options)
-        ],
+        "options": serialize_options(options),
         "count": len(options)
     }
 
 @app.get("/api/travel-options")
-def get_travel_options_api():
+async def get_travel_options_api():
     """Get available travel options"""
-    options = get_all_travel_options()
+    options = (await fetch_all_options(kinds=(TRAVEL,)))["travel_options"]
     return {
-        "options": [
-            {
-                "id": i,
-                "service": opt.service,
-                "mode": opt.mode,
-                "cost": opt.cost,
-                "eta_minutes": opt.eta_minutes,
-                "eta_variance": opt.eta_variance,
-                "rating": opt.rating
-            } for i, opt in enumerate(options)
-        ],
+        "options": serialize_options(options),
         "count": len(options)
     }
 
+def request_deadline(header_value: Optional[str], query_value: Optional[float]) -> Deadline:
+    """Deadline for this request from the X-Request-Deadline-Ms header or deadline_ms param"""
+    try:
+        return Deadline.from_request(header_value, query_value)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+def gather_plan_context(plan_date: str, destination: str, start_time: str, deadline: Deadline):
+    """Validate the plan inputs and gather (user_prefs, context), falling back to defaults"""
+    # Parse input
+    tz = pytz.timezone("Asia/Kolkata")
+    plan_datetime = tz.localize(datetime.strptime(f"{plan_date} {start_time}", "%Y-%m-%d %H:%M"))
+    
+    if destination not in CHENNAI_DESTINATIONS:
+        raise ValueError(f"Invalid destination: {destination}")
+    
+    # Gather context with error handling
+    user_prefs = {
+        "class_start_time": start_time,
+        "class_location": destination,
+        "distance_km": CHENNAI_DESTINATIONS[destination]["distance"]
+    }
+    
+    try:
+        context = context_agent.gather(user_prefs, deadline=deadline)
+    except Exception as ctx_err:
+        print(f"Context error: {ctx_err}")
+        context = {
+            "current_time": datetime.now(tz).strftime("%H:%M"),
+            "timezone": "Asia/Kolkata",
+            "date": datetime.now(tz).strftime("%A, %B %d, %Y"),
+            "minutes_until_class": 60,
+            "distance_km": CHENNAI_DESTINATIONS[destination]["distance"],
+            "class_location": destination,
+            "weather": "Sunny"
+        }
+    
+    context["plan_date"] = plan_date
+    context["destination"] = destination
+    return user_prefs, context
+
 @app.post("/api/plan")
-def plan_day(
+async def plan_day(
     plan_date: str = Query("2026-02-18"),
     destination: str = Query("IIT Madras"),
     start_time: str = Query("09:00"),
-    budget: int = Query(200)
+    budget: int = Query(200),
+    deadline_ms: Optional[float] = Query(None),
+    x_request_deadline_ms: Optional[str] = Header(None)
 ):
     """Plan the day with selections"""
+    deadline = request_deadline(x_request_deadline_ms, deadline_ms)
     try:
-        # Parse input
-        tz = pytz.timezone("Asia/Kolkata")
-        plan_datetime = tz.localize(datetime.strptime(f"{plan_date} {start_time}", "%Y-%m-%d %H:%M"))
-        
-        if destination not in CHENNAI_DESTINATIONS:
-            raise ValueError(f"Invalid destination: {destination}")
-        
-        # Gather context with error handling
-        user_prefs = {
-            "class_start_time": start_time,
-            "class_location": destination,
-            "distance_km": CHENNAI_DESTINATIONS[destination]["distance"]
-        }
-        
-        try:
-            context = context_agent.gather(user_prefs)
-        except Exception as ctx_err:
-            print(f"Context error: {ctx_err}")
-            context = {
-                "current_time": datetime.now(tz).strftime("%H:%M"),
-                "timezone": "Asia/Kolkata",
-                "date": datetime.now(tz).strftime("%A, %B %d, %Y"),
-                "minutes_until_class": 60,
-                "distance_km": CHENNAI_DESTINATIONS[destination]["distance"],
-                "class_location": destination,
-                "weather": "Sunny"
-            }
-        
-        context["plan_date"] = plan_date
-        context["destination"] = destination
+        user_prefs, context = gather_plan_context(plan_date, destination, start_time, deadline)
         
-        # Get options
-        food_options = get_all_food_options(budget)
-        travel_options = get_all_travel_options()
+        # Get options from all providers at once
+        fetched = await fetch_all_options(budget, deadline=deadline)
+        food_options = fetched["food_options"]
+        travel_options = fetched["travel_options"]
         
         if not food_options or not travel_options:
             return {
@@ -158,7 +181,8 @@ def plan_day(
                     "destination": destination,
                     "distance_km": CHENNAI_DESTINATIONS[destination]["distance"],
                     "minutes_until": context.get("minutes_until_class", 60)
-                }
+                },
+                "deadline": deadline.report()
             }
         
         # Create plan with error handling
@@ -179,27 +203,10 @@ def plan_day(
                 "minutes_until": max(0, context.get("minutes_until_class", 60))
             },
             "plan": plan if plan else [],
-            "food_options": [
-                {
-                    "id": i,
-                    "restaurant": opt.restaurant,
-                    "item": opt.item,
-                    "price": opt.price,
-                    "eta_minutes": opt.eta_minutes,
-                    "rating": opt.rating,
-                    "service": opt.service
-                } for i, opt in enumerate(food_options)
-            ],
-            "travel_options": [
-                {
-                    "id": i,
-                    "service": opt.service,
-                    "mode": opt.mode,
-                    "cost": opt.cost,
-                    "eta_minutes": opt.eta_minutes,
-                    "rating": opt.rating
-                } for i, opt in enumerate(travel_options)
-            ]
+            "providers": fetched["report"],
+            "deadline": deadline.report(),
+            "food_options": serialize_options(food_options, PLAN_FOOD_FIELDS),
+            "travel_options": serialize_options(travel_options, PLAN_TRAVEL_FIELDS)
         }
     
     except Exception as e:
@@ -217,19 +224,87 @@ def plan_day(
             }
         }
 
+@app.post("/api/plan/recommend")
+async def recommend_plan(
+    plan_date: str = Query("2026-02-18"),
+    destination: str = Query("IIT Madras"),
+    start_time: str = Query("09:00"),
+    budget: int = Query(200),
+    k: int = Query(RECOMMEND_TOP_K, ge=1, le=RECOMMEND_MAX_K),
+    cost_weight: float = Query(1.0, ge=0),
+    eta_weight: float = Query(1.0, ge=0),
+    confidence_weight: float = Query(1.0, ge=0),
+    deadline_ms: Optional[float] = Query(None),
+    x_request_deadline_ms: Optional[str] = Header(None)
+):
+    """Rank the Pareto-optimal food + travel combinations
+
+    The ids index the option lists /api/plan and /api/book fetch for the same budget.
+    """
+    if cost_weight + eta_weight + confidence_weight <= 0:
+        raise HTTPException(status_code=400, detail="At least one weight must be positive")
+    deadline = request_deadline(x_request_deadline_ms, deadline_ms)
+    try:
+        user_prefs, context = gather_plan_context(plan_date, destination, start_time, deadline)
+        
+        fetched = await fetch_all_options(budget, deadline=deadline)
+        food_options = fetched["food_options"]
+        travel_options = fetched["travel_options"]
+        
+        result = recommendation_agent.recommend(
+            food_options, travel_options, context,
+            {"cost": cost_weight, "eta": eta_weight, "confidence": confidence_weight},
+            k=k, deadline=deadline
+        )
+        for combo in result["recommendations"]:
+            combo["food"] = serialize_option(food_options[combo["food_id"]], PLAN_FOOD_FIELDS)
+            combo["travel"] = serialize_option(travel_options[combo["travel_id"]], PLAN_TRAVEL_FIELDS)
+        
+        return {
+            "state": "RECOMMENDATION",
+            "context": {
+                "current_time": context.get("current_time", "00:00"),
+                "plan_date": plan_date,
+                "destination": destination,
+                "distance_km": CHENNAI_DESTINATIONS[destination]["distance"],
+                "minutes_until": max(0, context.get("minutes_until_class", 60))
+            },
+            **result,
+            "providers": fetched["report"],
+            "deadline": deadline.report()
+        }
+    
+    except Exception as e:
+        print(f"Recommend error: {e}")
+        return {
+            "state": "ERROR",
+            "error": str(e)
+        }
+
 @app.post("/api/book")
-def book_selections(
+async def book_selections(
     plan_date: str = Query("2026-02-18"),
     destination: str = Query("IIT Madras"),
     start_time: str = Query("09:00"),
     food_id: int = Query(0),
-    travel_id: int = Query(0)
+    travel_id: int = Query(0),
+    budget: int = Query(300),
+    user_id: str = Query("default"),
+    deadline_ms: Optional[float] = Query(None),
+    x_request_deadline_ms: Optional[str] = Header(None)
 ):
     """Book selected food and travel"""
+    # Reject a bad user_id before anything is booked, not when the booking is logged
+    try:
+        user_id = validate_user_id(user_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    deadline = request_deadline(x_request_deadline_ms, deadline_ms)
     try:
-        # Get options again
-        food_options = get_all_food_options(300)
-        travel_options = get_all_travel_options()
+        # Get options again, for the budget the ids were chosen under
+        fetched = await fetch_all_options(budget, deadline=deadline)
+        food_options = fetched["food_options"]
+        travel_options = fetched["travel_options"]
         
         if food_id >= len(food_options) or travel_id >= len(travel_options):
             return {
@@ -247,49 +322,50 @@ def book_selections(
             "distance_km": CHENNAI_DESTINATIONS[destination]["distance"]
         }
         
-        context = context_agent.gather(user_prefs)
+        context = context_agent.gather(user_prefs, deadline=deadline)
         
         # Evaluate risk
-        risk = risk_agent.evaluate(selected_food, selected_travel, context)
+        risk = risk_agent.evaluate(selected_food, selected_travel, context, deadline=deadline)
         
         # Execute booking
-        execution = execution_agent.execute(selected_food, selected_travel, user_prefs)
+        execution = execution_agent.execute(selected_food, selected_travel, user_prefs, deadline=deadline)
+        if execution["status"] == "Deferred":
+            return {
+                "state": "TIMEOUT",
+                "error": execution["notes"],
+                "deadline": deadline.report()
+            }
         
         # Generate schedule
         schedule = schedule_agent.generate(user_prefs)
         
         # Log to memory
-        memory.log_execution({
+        await memory.log_execution({
             "date": plan_date,
             "destination": destination,
             "food": selected_food.restaurant,
             "travel": selected_travel.service,
             "confidence": risk["confidence"],
             "status": "booked"
-        })
+        }, user_id=user_id)
         
         return {
             "state": "SUCCESS",
             "booking": {
                 "food": {
-                    "restaurant": selected_food.restaurant,
-                    "item": selected_food.item,
-                    "price": selected_food.price,
-                    "eta_minutes": selected_food.eta_minutes,
-                    "service": selected_food.service,
+                    **serialize_option(selected_food, BOOKED_FOOD_FIELDS),
                     "confirmation": f"FOOD-{plan_date}-{food_id}"
                 },
                 "travel": {
-                    "service": selected_travel.service,
-                    "mode": selected_travel.mode,
-                    "cost": selected_travel.cost,
-                    "eta_minutes": selected_travel.eta_minutes,
+                    **serialize_option(selected_travel, BOOKED_TRAVEL_FIELDS),
                     "confirmation": f"RIDE-{plan_date}-{travel_id}"
                 },
                 "risk_confidence": int(risk["confidence"] * 100),
+                "on_time_probability": round(risk["on_time_probability"], 4),
                 "buffer_minutes": risk["buffer_minutes"]
             },
-            "schedule": schedule
+            "schedule": schedule,
+            "deadline": deadline.report()
         }
     
     except Exception as e:
@@ -299,14 +375,60 @@ def book_selections(
         }
 
 @app.get("/api/history")
-def get_history(limit: int = Query(5)):
-    """Get recent bookings"""
-    history = memory.get_execution_history(limit)
+async def get_history(
+    limit: int = Query(5, ge=1),
+    since: Optional[str] = Query(None),
+    until: Optional[str] = Query(None),
+    cursor: Optional[str] = Query(None),
+    user_id: str = Query("default")
+):
+    """Get recent bookings, or page through a time range with since/until/cursor"""
+    try:
+        if since or until or cursor:
+            page = await memory.query_history(
+                since=since, until=until, cursor=cursor, limit=limit, user_id=user_id
+            )
+            return {
+                "history": page["records"],
+                "count": len(page["records"]),
+                "next_cursor": page["next_cursor"]
+            }
+
+        history = await memory.get_execution_history(limit, user_id=user_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
     return {
         "history": history,
         "count": len(history)
     }
 
+@app.get("/api/stats")
+async def get_stats(user_id: str = Query("default")):
+    """Get all-time booking statistics"""
+    try:
+        return await memory.get_stats(user_id=user_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/api/providers")
+def get_providers_api():
+    """List registered providers with their mode, capabilities, cost and latency class"""
+    return {"providers": describe_providers()}
+
+@app.get("/api/metrics")
+def get_metrics():
+    """Get internal cache and storage counters"""
+    return {
+        "memory_cache": memory.get_cache_stats(),
+        "provider_pools": http_client.get_pool_stats(),
+        "quote_cache": quote_cache.get_stats(),
+        "single_flight": quote_cache.flight.get_stats(),
+        "circuit_breakers": get_breaker_stats(),
+        "rate_limits": get_limiter_stats(),
+        "risk_memo": risk_agent.memo.get_stats()
+    }
+
 def get_dashboard_html() -> str:
     """Generate interactive dashboard HTML"""
     return """
@@ -1165,7 +1287,7 @@ def get_dashboard_html() -> str:
 
             try {
                 const response = await fetch(
-                    `/api/book?plan_date=${state.date}&destination=${encodeURIComponent(state.destination)}&start_time=${state.time}&food_id=${state.selectedFood}&travel_id=${state.selectedTravel}`,
+                    `/api/book?plan_date=${state.date}&destination=${encodeURIComponent(state.destination)}&start_time=${state.time}&food_id=${state.selectedFood}&travel_id=${state.selectedTravel}&budget=${state.budget}`,
                     { method: 'POST' }
                 );
                 const data = await response.json();
@@ -0,0 +1,55 @@
+"""
+Memory store maintenance commands
+
+Run from docs/backend:
+    python -m app.memory rebuild-stats [--user-id ID]
+    python -m app.memory migrate SOURCE [--backend json|sqlite] [--user-id ID] [--dry-run]
+"""
+
+import argparse
+import json
+from pathlib import Path
+
+from app.config import MEMORY_BACKEND
+from app.memory.migrate import migrate
+from app.memory.store import create_memory_store
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m app.memory", description="Memory store maintenance")
+    commands = parser.add_subparsers(dest="command", required=True)
+    rebuild = commands.add_parser("rebuild-stats", help="Recompute usage statistics from the execution log")
+    rebuild.add_argument("--user-id", default="default", help="User whose statistics to rebuild")
+
+    migration = commands.add_parser("migrate", help="Stream a legacy memory file into the current store")
+    migration.add_argument("source", type=Path, help="Legacy .json document, .jsonl journal or .jsonl.gz segment")
+    migration.add_argument("--backend", choices=["json", "sqlite"], default=MEMORY_BACKEND)
+    migration.add_argument("--user-id", default="default", help="User the records belong to")
+    migration.add_argument("--batch-size", type=int, default=500)
+    migration.add_argument("--dedupe-window", type=int, default=10000, help="Recent records checked for repeats")
+    migration.add_argument("--skip-preferences", action="store_true", help="Do not merge legacy preferences")
+    migration.add_argument("--dry-run", action="store_true", help="Parse and count without writing")
+
+    args = parser.parse_args(argv)
+    store = create_memory_store(getattr(args, "backend", MEMORY_BACKEND))
+
+    try:
+        if args.command == "rebuild-stats":
+            print(json.dumps(store.rebuild_stats(user_id=args.user_id), indent=2))
+        elif args.command == "migrate":
+            counts = migrate(
+                args.source,
+                store,
+                user_id=args.user_id,
+                batch_size=args.batch_size,
+                dedupe_window=args.dedupe_window,
+                include_preferences=not args.skip_preferences,
+                dry_run=args.dry_run
+            )
+            print(json.dumps(counts, indent=2))
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Async facade over the memory store
+Blocking file/database I/O runs on a dedicated, bounded thread pool so async
+request handlers never stall the event loop.
+"""
+
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+from app.config import MEMORY_IO_WORKERS, MEMORY_IO_QUEUE_LIMIT
+from app.memory.sharded import DEFAULT_USER_ID
+
+
+class AsyncMemoryStore:
+    def __init__(self, store, max_workers: int = MEMORY_IO_WORKERS, queue_limit: int = MEMORY_IO_QUEUE_LIMIT):
+        self.store = store
+        self.queue_limit = max(1, queue_limit)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="memory-io")
+        # Created on first use so it binds to the running event loop
+        self._slots: Optional[asyncio.Semaphore] = None
+
+    async def _run(self, fn: Callable, *args, **kwargs) -> Any:
+        """Run a blocking store call on the memory I/O pool"""
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.queue_limit)
+
+        # Callers wait here instead of piling unbounded work onto the pool
+        async with self._slots:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, functools.partial(fn, *args, **kwargs))
+
+    async def get_user_preferences(self, user_id: str = DEFAULT_USER_ID) -> Dict[str, Any]:
+        """Get one user's preferences"""
+        return await self._run(self.store.get_user_preferences, user_id=user_id)
+
+    async def save_user_preferences(self, prefs: Dict[str, Any], user_id: str = DEFAULT_USER_ID) -> None:
+        """Save one user's preferences"""
+        await self._run(self.store.save_user_preferences, prefs, user_id=user_id)
+
+    async def log_execution(self, record: Dict[str, Any], user_id: str = DEFAULT_USER_ID) -> None:
+        """Log an execution record for one user"""
+        await self._run(self.store.log_execution, record, user_id=user_id)
+
+    async def get_execution_history(self, limit: int = 10, user_id: str = DEFAULT_USER_ID) -> List[Dict[str, Any]]:
+        """Get one user's recent execution records"""
+        return await self._run(self.store.get_execution_history, limit, user_id=user_id)
+
+    async def query_history(
+        self,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        cursor: Optional[str] = None,
+        limit: int = 50,
+        user_id: str = DEFAULT_USER_ID
+    ) -> Dict[str, Any]:
+        """Page through one user's history in time order"""
+        return await self._run(
+            self.store.query_history, since=since, until=until, cursor=cursor, limit=limit, user_id=user_id
+        )
+
+    async def get_stats(self, user_id: str = DEFAULT_USER_ID) -> Dict[str, Any]:
+        """Get one user's usage statistics"""
+        return await self._run(self.store.get_stats, user_id=user_id)
+
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """Counters are held in memory, no I/O needed"""
+        return self.store.get_cache_stats()
+
+    async def close(self) -> None:
+        """Drain the underlying store, then stop the I/O pool"""
+        await self._run(self.store.close)
+        self._executor.shutdown(wait=True)
@@ -0,0 +1,241 @@
+"""
+Streaming migration for legacy agent_memory.json layouts
+
+main_old.py wrote {"preferences": ..., "history": [{"execution": {...}, ...}]};
+main_old_v1.py logged whole option dicts. This reads any of those (or a JSONL
+journal / gzip archive segment) one record at a time, normalizes each record to
+the current schema and imports it into the configured store, which files it in
+time order alongside what is already there. Memory use does not depend on
+the size of the input file.
+"""
+
+import gzip
+import hashlib
+import json
+from collections import OrderedDict
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from app.memory.sharded import DEFAULT_USER_ID
+
+CHUNK_SIZE = 64 * 1024
+HISTORY_KEYS = ("execution_history", "history")
+PREFERENCE_KEYS = ("user_preferences", "preferences")
+WHITESPACE = " \t\r\n"
+
+
+class _JSONStream:
+    """Pull parser that decodes one JSON value at a time from a text file"""
+
+    def __init__(self, f):
+        self.f = f
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+
+    def _fill(self, min_size: int = CHUNK_SIZE) -> bool:
+        """Drop consumed input and read more; False at end of file"""
+        if self.eof:
+            return False
+        if self.pos:
+            self.buf = self.buf[self.pos:]
+            self.pos = 0
+        chunk = self.f.read(max(CHUNK_SIZE, min_size))
+        if not chunk:
+            self.eof = True
+            return False
+        self.buf += chunk
+        return True
+
+    def peek(self) -> str:
+        """Next non-whitespace character, '' at end of input"""
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill():
+                return ""
+
+    def expect(self, char: str) -> None:
+        found = self.peek()
+        if found != char:
+            raise ValueError(f"Expected {char!r} but found {found!r}")
+        self.pos += 1
+
+    def value(self) -> Any:
+        """Decode the next complete JSON value, reading more input until it fits"""
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buf, self.pos)
+                # A number ending exactly at the buffer edge may continue in the next chunk
+                if end < len(self.buf) or self.eof:
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            # Grow geometrically so a large value costs O(n), not O(n^2)
+            self._fill(len(self.buf))
+
+    def array_items(self) -> Iterator[Any]:
+        """Yield the items of the array starting at the current position"""
+        self.expect("[")
+        if self.peek() == "]":
+            self.pos += 1
+            return
+        while True:
+            yield self.value()
+            separator = self.peek()
+            self.pos += 1
+            if separator == "]":
+                return
+            if separator != ",":
+                raise ValueError(f"Expected ',' or ']' but found {separator!r}")
+
+
+def _open_text(path: Path):
+    if path.suffix == ".gz":
+        return gzip.open(path, "rt", encoding="utf-8")
+    return open(path, "r", encoding="utf-8")
+
+
+def iter_source(path: Path) -> Iterator[Tuple[str, Any]]:
+    """Yield ("record", raw) and ("preferences", raw) items from any supported layout"""
+    with _open_text(path) as f:
+        if path.name.endswith((".jsonl", ".jsonl.gz")):
+            for line in f:
+                if line.strip():
+                    yield "record", json.loads(line)
+            return
+
+        stream = _JSONStream(f)
+        if stream.peek() == "[":
+            for item in stream.array_items():
+                yield "record", item
+            return
+
+        stream.expect("{")
+        if stream.peek() == "}":
+            return
+        while True:
+            key = stream.value()
+            stream.expect(":")
+            if key in HISTORY_KEYS and stream.peek() == "[":
+                for item in stream.array_items():
+                    yield "record", item
+            else:
+                value = stream.value()
+                if key in PREFERENCE_KEYS:
+                    yield "preferences", value
+
+            separator = stream.peek()
+            stream.pos += 1
+            if separator == "}":
+                return
+            if separator != ",":
+                raise ValueError(f"Expected ',' or '}}' but found {separator!r}")
+
+
+def _name(value: Any, *keys: str) -> Any:
+    """main_old_v1 logged whole option dicts where we now keep a name"""
+    if isinstance(value, dict):
+        for key in keys:
+            if value.get(key):
+                return value[key]
+        return None
+    return value
+
+
+def normalize_record(raw: Any, fallback_timestamp: str) -> Optional[Dict[str, Any]]:
+    """Map a legacy execution record onto the current schema"""
+    if not isinstance(raw, dict):
+        return None
+
+    execution = raw.get("execution") if isinstance(raw.get("execution"), dict) else {}
+    timestamp = raw.get("timestamp") or execution.get("timestamp") or fallback_timestamp
+
+    record = {
+        "date": raw.get("date") or str(timestamp)[:10],
+        "destination": raw.get("destination"),
+        "food": _name(raw.get("food", execution.get("food_ordered")), "restaurant", "item"),
+        "travel": _name(raw.get("travel", execution.get("travel_booked")), "service", "mode"),
+        "confidence": float(raw.get("confidence", 0) or 0),
+        "status": raw.get("status") or ("executed" if execution else "booked"),
+        "timestamp": str(timestamp)
+    }
+    buffer_minutes = raw.get("buffer_minutes", raw.get("buffer"))
+    if buffer_minutes is not None:
+        record["buffer_minutes"] = buffer_minutes
+    return record
+
+
+class _RecentFingerprints:
+    """Bounded set of record fingerprints, so deduplication runs in constant memory"""
+
+    def __init__(self, capacity: int):
+        self.capacity = max(1, capacity)
+        self._seen: "OrderedDict[bytes, None]" = OrderedDict()
+
+    def add(self, record: Dict[str, Any]) -> bool:
+        """Remember a record; False if it was seen recently"""
+        fingerprint = hashlib.blake2b(
+            json.dumps(record, sort_keys=True, default=str).encode("utf-8"), digest_size=16
+        ).digest()
+        if fingerprint in self._seen:
+            self._seen.move_to_end(fingerprint)
+            return False
+        self._seen[fingerprint] = None
+        if len(self._seen) > self.capacity:
+            self._seen.popitem(last=False)
+        return True
+
+
+def migrate(
+    source: Path,
+    store,
+    user_id: str = DEFAULT_USER_ID,
+    batch_size: int = 500,
+    dedupe_window: int = 10000,
+    include_preferences: bool = True,
+    dry_run: bool = False
+) -> Dict[str, int]:
+    """Stream legacy records from source into store; returns counters"""
+    counts = {"read": 0, "imported": 0, "duplicates": 0, "skipped": 0, "preferences": 0}
+    # Records from layouts that never had timestamps get the file's modification time
+    fallback_timestamp = datetime.fromtimestamp(source.stat().st_mtime).isoformat()
+    seen = _RecentFingerprints(dedupe_window)
+    batch: List[Dict[str, Any]] = []
+
+    for kind, value in iter_source(source):
+        if kind == "preferences":
+            if include_preferences and isinstance(value, dict):
+                counts["preferences"] += 1
+                if not dry_run:
+                    prefs = store.get_user_preferences(user_id=user_id)
+                    prefs.update(value)
+                    store.save_user_preferences(prefs, user_id=user_id)
+            continue
+
+        counts["read"] += 1
+        record = normalize_record(value, fallback_timestamp)
+        if record is None:
+            counts["skipped"] += 1
+            continue
+        if not seen.add(record):
+            counts["duplicates"] += 1
+            continue
+
+        counts["imported"] += 1
+        batch.append(record)
+        if len(batch) >= batch_size:
+            if not dry_run:
+                store.import_executions(batch, user_id=user_id)
+            batch = []
+
+    if batch and not dry_run:
+        store.import_executions(batch, user_id=user_id)
+    return counts
@@ -0,0 +1,145 @@
+"""
+Per-user memory shards
+Each user gets their own store (own files, or own partition of the SQLite
+tables); only the most recently used shards are kept open.
+"""
+
+import re
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional
+
+from app.config import MEMORY_SHARD_CACHE_SIZE
+
+DEFAULT_USER_ID = "default"
+USER_ID_PATTERN = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+
+def validate_user_id(user_id: Optional[str]) -> str:
+    """User ids become file and partition names, so keep them to a safe alphabet"""
+    user_id = user_id or DEFAULT_USER_ID
+    if not USER_ID_PATTERN.match(user_id):
+        raise ValueError(f"Invalid user_id: {user_id!r}")
+    return user_id
+
+
+class ShardedMemoryStore:
+    def __init__(self, open_shard: Callable[[str], Any], capacity: int = MEMORY_SHARD_CACHE_SIZE):
+        self._open_shard = open_shard
+        self.capacity = max(1, capacity)
+        self._shards: "OrderedDict[str, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.opened = 0
+        self.evictions = 0
+
+    def for_user(self, user_id: Optional[str] = DEFAULT_USER_ID):
+        """Get the store for one user, opening it and evicting the least recently used if needed"""
+        user_id = validate_user_id(user_id)
+        evicted = []
+
+        with self._lock:
+            shard = self._shards.get(user_id)
+            if shard is not None:
+                self._shards.move_to_end(user_id)
+                return shard
+
+        # Opening does file I/O (and may rebuild stats), so other users must not wait on it
+        opened = self._open_shard(user_id)
+
+        with self._lock:
+            shard = self._shards.get(user_id)
+            if shard is None:
+                # Nobody opened this user meanwhile: publish ours
+                shard = self._shards[user_id] = opened
+                opened = None
+                self.opened += 1
+                while len(self._shards) > self.capacity:
+                    evicted.append(self._shards.popitem(last=False)[1])
+                    self.evictions += 1
+            else:
+                self._shards.move_to_end(user_id)
+
+        # Closing drains write-behind queues, do it outside the lock
+        if opened is not None:
+            evicted.append(opened)
+        for old in evicted:
+            old.close()
+        return shard
+
+    def get_user_preferences(self, user_id: str = DEFAULT_USER_ID) -> Dict[str, Any]:
+        """Get one user's preferences"""
+        return self.for_user(user_id).get_user_preferences()
+
+    def save_user_preferences(self, prefs: Dict[str, Any], user_id: str = DEFAULT_USER_ID) -> None:
+        """Save one user's preferences"""
+        self.for_user(user_id).save_user_preferences(prefs)
+
+    def log_execution(self, record: Dict[str, Any], user_id: str = DEFAULT_USER_ID) -> None:
+        """Log an execution record for one user"""
+        self.for_user(user_id).log_execution(record)
+
+    def import_executions(self, records: List[Dict[str, Any]], user_id: str = DEFAULT_USER_ID) -> None:
+        """Append already-timestamped records for one user"""
+        self.for_user(user_id).import_executions(records)
+
+    def get_execution_history(self, limit: int = 10, user_id: str = DEFAULT_USER_ID) -> List[Dict[str, Any]]:
+        """Get one user's recent execution records"""
+        return self.for_user(user_id).get_execution_history(limit)
+
+    def query_history(
+        self,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        cursor: Optional[str] = None,
+        limit: int = 50,
+        user_id: str = DEFAULT_USER_ID
+    ) -> Dict[str, Any]:
+        """Page through one user's history in time order"""
+        return self.for_user(user_id).query_history(since=since, until=until, cursor=cursor, limit=limit)
+
+    def get_stats(self, user_id: str = DEFAULT_USER_ID) -> Dict[str, Any]:
+        """Get one user's usage statistics"""
+        return self.for_user(user_id).get_stats()
+
+    def rebuild_stats(self, user_id: str = DEFAULT_USER_ID) -> Dict[str, Any]:
+        """Recompute one user's usage statistics"""
+        return self.for_user(user_id).rebuild_stats()
+
+    def _loaded(self) -> List[Any]:
+        """Snapshot of the currently loaded shards"""
+        with self._lock:
+            return list(self._shards.values())
+
+    def flush(self) -> int:
+        """Commit queued records of every loaded shard"""
+        return sum(shard.flush() for shard in self._loaded())
+
+    def close(self) -> None:
+        """Close every loaded shard"""
+        with self._lock:
+            shards = list(self._shards.values())
+            self._shards.clear()
+        for shard in shards:
+            shard.close()
+
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """Read cache counters summed over loaded shards, plus shard LRU counters"""
+        stats = {
+            "shards_loaded": 0,
+            "shard_capacity": self.capacity,
+            "shards_opened": self.opened,
+            "shard_evictions": self.evictions,
+            "enabled": False,
+            "hits": 0,
+            "misses": 0
+        }
+        for shard in self._loaded():
+            shard_stats = shard.get_cache_stats()
+            stats["shards_loaded"] += 1
+            stats["enabled"] = stats["enabled"] or shard_stats.get("enabled", False)
+            stats["hits"] += shard_stats.get("hits", 0)
+            stats["misses"] += shard_stats.get("misses", 0)
+
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = round(stats["hits"] / lookups, 4) if lookups else 0
+        return stats
@@ -0,0 +1,285 @@
+"""
+SQLite-backed memory store
+Same interface as MemoryStore, but every operation is a single indexed query
+instead of a whole-file read-modify-write. Each store instance is one user's
+partition of the shared tables.
+"""
+
+import copy
+import json
+import threading
+from datetime import datetime
+from typing import Dict, Any, List, Optional
+
+from sqlalchemy import (
+    Column, Float, Index, Integer, MetaData, String, Table, Text,
+    and_, create_engine, event, func, inspect, insert, or_, select, text, update
+)
+
+from app.config import CONFIDENCE_THRESHOLD
+from app.memory.store import (
+    DEFAULT_USER_PREFERENCES, format_stats, normalize_time_bound, parse_history_cursor
+)
+
+metadata = MetaData()
+
+user_preferences_table = Table(
+    "user_preferences", metadata,
+    Column("user_id", String(64), primary_key=True),
+    Column("data", Text, nullable=False),
+)
+
+execution_history_table = Table(
+    "execution_history", metadata,
+    Column("id", Integer, primary_key=True, autoincrement=True),
+    Column("user_id", String(64), nullable=False, server_default="default"),
+    Column("timestamp", String(32), nullable=False, index=True),
+    Column("destination", String(128), index=True),
+    Column("status", String(32), index=True),
+    Column("confidence", Float, nullable=False, default=0.0),
+    Column("record", Text, nullable=False),
+    Index("ix_execution_history_user_timestamp", "user_id", "timestamp"),
+)
+
+# One row of running aggregates per user so get_stats never scans the history table
+usage_stats_table = Table(
+    "usage_stats", metadata,
+    Column("user_id", String(64), primary_key=True),
+    Column("total_executions", Integer, nullable=False, default=0),
+    Column("successful", Integer, nullable=False, default=0),
+    Column("confidence_sum", Float, nullable=False, default=0.0),
+)
+
+# Engines are shared by every user partition of the same database
+_engines = {}
+_engines_lock = threading.Lock()
+
+
+def _enable_wal(dbapi_connection, connection_record):
+    """Switch every new connection to WAL so readers never block the writer"""
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA busy_timeout=5000")
+    cursor.close()
+
+
+def _upgrade_single_user_schema(engine) -> None:
+    """Add the user_id partition key to databases created before per-user shards"""
+    inspector = inspect(engine)
+    tables = inspector.get_table_names()
+
+    with engine.begin() as conn:
+        if "execution_history" in tables:
+            columns = {column["name"] for column in inspector.get_columns("execution_history")}
+            if "user_id" not in columns:
+                conn.execute(text(
+                    "ALTER TABLE execution_history ADD COLUMN user_id VARCHAR(64) NOT NULL DEFAULT 'default'"
+                ))
+                conn.execute(text(
+                    "CREATE INDEX ix_execution_history_user_timestamp ON execution_history (user_id, timestamp)"
+                ))
+
+        if "user_preferences" in tables:
+            columns = {column["name"] for column in inspector.get_columns("user_preferences")}
+            if "user_id" not in columns:
+                row = conn.execute(text("SELECT data FROM user_preferences WHERE id = 1")).first()
+                conn.execute(text("DROP TABLE user_preferences"))
+                user_preferences_table.create(conn)
+                if row:
+                    conn.execute(insert(user_preferences_table).values(user_id="default", data=row.data))
+
+        if "usage_stats" in tables:
+            columns = {column["name"] for column in inspector.get_columns("usage_stats")}
+            if "user_id" not in columns:
+                # Derived data: rebuilt per user on first access
+                conn.execute(text("DROP TABLE usage_stats"))
+
+
+def get_engine(db_url: str):
+    """Create (once per URL) a WAL-mode engine with the schema in place"""
+    with _engines_lock:
+        engine = _engines.get(db_url)
+        if engine is None:
+            engine = create_engine(db_url, connect_args={"check_same_thread": False})
+            event.listen(engine, "connect", _enable_wal)
+            _upgrade_single_user_schema(engine)
+            metadata.create_all(engine)
+            _engines[db_url] = engine
+        return engine
+
+
+class SQLiteMemoryStore:
+    def __init__(self, db_url: str, user_id: str = "default"):
+        self.engine = get_engine(db_url)
+        self.user_id = user_id
+
+        with self.engine.connect() as conn:
+            has_stats = conn.execute(
+                select(usage_stats_table.c.user_id).where(usage_stats_table.c.user_id == user_id)
+            ).first() is not None
+        if not has_stats:
+            self.rebuild_stats()
+
+    def get_user_preferences(self) -> Dict[str, Any]:
+        """Get user preferences"""
+        prefs = user_preferences_table
+        with self.engine.connect() as conn:
+            row = conn.execute(select(prefs.c.data).where(prefs.c.user_id == self.user_id)).first()
+        return json.loads(row.data) if row else copy.deepcopy(DEFAULT_USER_PREFERENCES)
+
+    def save_user_preferences(self, prefs: Dict[str, Any]) -> None:
+        """Save user preferences"""
+        data = json.dumps(prefs, default=str)
+        table = user_preferences_table
+        with self.engine.begin() as conn:
+            result = conn.execute(
+                update(table).where(table.c.user_id == self.user_id).values(data=data)
+            )
+            if result.rowcount == 0:
+                conn.execute(insert(table).values(user_id=self.user_id, data=data))
+
+    def log_execution(self, record: Dict[str, Any]) -> None:
+        """Log an execution record"""
+        record["timestamp"] = datetime.now().isoformat()
+        confidence = float(record.get("confidence", 0) or 0)
+        stats = usage_stats_table
+
+        with self.engine.begin() as conn:
+            conn.execute(insert(execution_history_table).values(
+                user_id=self.user_id,
+                timestamp=record["timestamp"],
+                destination=record.get("destination"),
+                status=record.get("status"),
+                confidence=confidence,
+                record=json.dumps(record, default=str),
+            ))
+            conn.execute(
+                update(stats)
+                .where(stats.c.user_id == self.user_id)
+                .values(
+                    total_executions=stats.c.total_executions + 1,
+                    successful=stats.c.successful + int(confidence >= CONFIDENCE_THRESHOLD),
+                    confidence_sum=stats.c.confidence_sum + confidence,
+                )
+            )
+
+    def import_executions(self, records: List[Dict[str, Any]]) -> None:
+        """Insert already-timestamped records (migrations) in one transaction"""
+        if not records:
+            return
+        confidences = [float(record.get("confidence", 0) or 0) for record in records]
+        stats = usage_stats_table
+
+        with self.engine.begin() as conn:
+            conn.execute(insert(execution_history_table), [
+                {
+                    "user_id": self.user_id,
+                    "timestamp": record.get("timestamp") or "",
+                    "destination": record.get("destination"),
+                    "status": record.get("status"),
+                    "confidence": confidence,
+                    "record": json.dumps(record, default=str),
+                }
+                for record, confidence in zip(records, confidences)
+            ])
+            conn.execute(
+                update(stats)
+                .where(stats.c.user_id == self.user_id)
+                .values(
+                    total_executions=stats.c.total_executions + len(records),
+                    successful=stats.c.successful + sum(c >= CONFIDENCE_THRESHOLD for c in confidences),
+                    confidence_sum=stats.c.confidence_sum + sum(confidences),
+                )
+            )
+
+    def get_execution_history(self, limit: int = 10) -> List[Dict[str, Any]]:
+        """Get execution history, oldest first like the JSON store"""
+        history = execution_history_table
+        with self.engine.connect() as conn:
+            rows = conn.execute(
+                select(history.c.record)
+                .where(history.c.user_id == self.user_id)
+                .order_by(history.c.timestamp.desc(), history.c.id.desc())
+                .limit(limit)
+            ).all()
+        return [json.loads(row.record) for row in reversed(rows)]
+
+    def query_history(
+        self,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        cursor: Optional[str] = None,
+        limit: int = 50
+    ) -> Dict[str, Any]:
+        """Page through the history in time order using the timestamp index"""
+        if limit <= 0:
+            raise ValueError(f"Invalid limit: {limit}")
+        history = execution_history_table
+        since = normalize_time_bound(since)
+        until = normalize_time_bound(until)
+        # Same cursor shape as the JSON store, with the row id as tie-breaker
+        cursor_time, cursor_id = parse_history_cursor(cursor)
+
+        query = select(history.c.id, history.c.timestamp, history.c.record).where(
+            history.c.user_id == self.user_id
+        )
+        if since:
+            query = query.where(history.c.timestamp >= since)
+        if until:
+            query = query.where(history.c.timestamp <= until)
+        if cursor_time:
+            query = query.where(or_(
+                history.c.timestamp > cursor_time,
+                and_(history.c.timestamp == cursor_time, history.c.id > cursor_id)
+            ))
+        query = query.order_by(history.c.timestamp, history.c.id).limit(limit + 1)
+
+        with self.engine.connect() as conn:
+            rows = conn.execute(query).all()
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = f"{rows[-1].timestamp}|{rows[-1].id}"
+
+        return {"records": [json.loads(row.record) for row in rows], "next_cursor": next_cursor}
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get all-time usage statistics from the running aggregates"""
+        stats = usage_stats_table
+        with self.engine.connect() as conn:
+            row = conn.execute(
+                select(stats.c.total_executions, stats.c.successful, stats.c.confidence_sum)
+                .where(stats.c.user_id == self.user_id)
+            ).one()
+        return format_stats(dict(row._mapping))
+
+    def rebuild_stats(self) -> Dict[str, Any]:
+        """Recompute the running aggregates from the execution_history table"""
+        history = execution_history_table
+        with self.engine.begin() as conn:
+            row = conn.execute(select(
+                func.count(history.c.id),
+                func.sum((history.c.confidence >= CONFIDENCE_THRESHOLD).cast(Integer)),
+                func.sum(history.c.confidence),
+            ).where(history.c.user_id == self.user_id)).one()
+            totals = {
+                "total_executions": row[0] or 0,
+                "successful": row[1] or 0,
+                "confidence_sum": float(row[2] or 0),
+            }
+            conn.execute(usage_stats_table.delete().where(usage_stats_table.c.user_id == self.user_id))
+            conn.execute(insert(usage_stats_table).values(user_id=self.user_id, **totals))
+        return format_stats(totals)
+
+    def flush(self) -> int:
+        """Every write is committed immediately, nothing is ever queued"""
+        return 0
+
+    def close(self) -> None:
+        """Nothing to release per user, the engine is shared by every partition"""
+
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """SQLite serves reads from its own page cache, there is no parsed-file cache"""
+        return {"enabled": False}
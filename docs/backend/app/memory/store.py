@@ -1,96 +1,704 @@
+import copy
+import gzip
+import io
 import json
+import logging
+import os
+import stat
+import tempfile
+import threading
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, Callable, Iterable, List, Optional, Tuple
 from datetime import datetime
 
+try:
+    import fcntl
+except ImportError:  # Windows: fall back to in-process locking only
+    fcntl = None
+
+from app.config import (
+    MEMORY_BACKEND, MEMORY_DB_URL, HISTORY_RETENTION, HISTORY_COMPACT_EVERY,
+    CONFIDENCE_THRESHOLD, MEMORY_WRITE_BEHIND, MEMORY_FLUSH_INTERVAL,
+    MEMORY_FLUSH_BATCH_SIZE, MEMORY_FSYNC, HISTORY_SEGMENT_PERIOD
+)
+from app.memory.sharded import DEFAULT_USER_ID, ShardedMemoryStore, validate_user_id
+
+logger = logging.getLogger(__name__)
+
 # Use absolute path relative to this file's location
 MEMORY_FILE = Path(__file__).parent.parent.parent / "agent_memory.json"
+MEMORY_DB_FILE = MEMORY_FILE.with_suffix(".db")
+# Every user other than the default one gets a directory of their own
+MEMORY_SHARD_DIR = MEMORY_FILE.parent / "agent_memory_users"
+
+# Bytes read per step when scanning the execution journal backwards
+TAIL_BLOCK_SIZE = 8192
+
+# Process umask, read once (os.umask can only be queried by setting it)
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+DEFAULT_USER_PREFERENCES = {
+    "location": "Indiranagar, Bangalore",
+    "food_budget": 200,
+    "cuisine_preferences": ["South Indian", "Fast Food"],
+    "class_start_time": "09:00",
+    "class_location": "IIT Madras",
+    "timezone": "Asia/Kolkata"
+}
+
+
+def _read_tail_lines(path: Path, count: int) -> List[bytes]:
+    """Read the last `count` lines of a file by seeking backwards from the end"""
+    if count <= 0:
+        return []
+
+    with open(path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        position = f.tell()
+        data = b""
+        # One extra newline guarantees the first complete line we keep is whole
+        while position > 0 and data.count(b"\n") <= count:
+            step = min(TAIL_BLOCK_SIZE, position)
+            position -= step
+            f.seek(position)
+            data = f.read(step) + data
+
+    lines = data.splitlines()
+    if position > 0:
+        # The first line was cut by the seek, drop it
+        lines = lines[1:]
+    return [line for line in lines if line.strip()][-count:]
+
+
+def empty_totals() -> Dict[str, Any]:
+    """Running aggregates for an empty execution log"""
+    return {"total_executions": 0, "successful": 0, "confidence_sum": 0.0}
+
+
+def add_to_totals(totals: Dict[str, Any], records: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    """Fold execution records into running aggregates"""
+    for record in records:
+        confidence = float(record.get("confidence", 0) or 0)
+        totals["total_executions"] += 1
+        totals["confidence_sum"] += confidence
+        if confidence >= CONFIDENCE_THRESHOLD:
+            totals["successful"] += 1
+    return totals
+
+
+def format_stats(totals: Dict[str, Any]) -> Dict[str, Any]:
+    """Turn running aggregates into the get_stats response"""
+    total_executions = totals["total_executions"]
+    successful = totals["successful"]
+    average_confidence = totals["confidence_sum"] / total_executions if total_executions else 0
+
+    return {
+        "total_executions": total_executions,
+        "successful": successful,
+        "success_rate": (successful / total_executions * 100) if total_executions else 0,
+        "average_confidence": round(average_confidence, 2)
+    }
+
+
+def _parse_lines(lines: List[bytes]) -> List[Dict[str, Any]]:
+    """Parse journal lines, skipping a torn final line from an interrupted append"""
+    records = []
+    for line in lines:
+        try:
+            records.append(json.loads(line))
+        except json.JSONDecodeError:
+            continue
+    return records
+
+
+def _file_signature(path: Path) -> Optional[Tuple[int, int, int]]:
+    """Identify a file version by inode, size and mtime"""
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (st.st_ino, st.st_size, st.st_mtime_ns)
+
+
+def _record_time(record: Dict[str, Any]) -> str:
+    """Sort key for records: their timestamp, undated ones first"""
+    return record.get("timestamp") or ""
+
+
+def _segment_key(timestamp: Optional[str]) -> str:
+    """Archive segment a record belongs to: its day, or ISO week"""
+    try:
+        moment = datetime.fromisoformat(timestamp)
+    except (TypeError, ValueError):
+        return "undated"
+    if HISTORY_SEGMENT_PERIOD == "week":
+        year, week, _ = moment.isocalendar()
+        return f"{year}-W{week:02d}"
+    return moment.date().isoformat()
+
+
+def normalize_time_bound(value: Optional[str]) -> Optional[str]:
+    """Normalize a since/until query value to the isoformat used in records"""
+    if not value:
+        return None
+    return datetime.fromisoformat(value).isoformat()
+
+
+def parse_history_cursor(cursor: Optional[str]) -> Tuple[Optional[str], int]:
+    """A cursor is '<timestamp>|<records already returned with that timestamp>'"""
+    if not cursor:
+        return None, 0
+    timestamp, _, seen = cursor.rpartition("|")
+    if not timestamp or not seen.isdigit():
+        raise ValueError(f"Invalid cursor: {cursor}")
+    return timestamp, int(seen)
+
+
+def _atomic_write(path: Path, chunks, binary: bool = False) -> None:
+    """Write to a temp file, fsync it, then rename over path so readers never see a partial file"""
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with (os.fdopen(fd, "wb") if binary else os.fdopen(fd, "w", encoding="utf-8")) as f:
+            for chunk in chunks:
+                f.write(chunk)
+            f.flush()
+            os.fsync(f.fileno())
+        # mkstemp creates the file 0600; give it the mode a plain open() would have
+        try:
+            mode = stat.S_IMODE(os.stat(path).st_mode)
+        except FileNotFoundError:
+            mode = 0o666 & ~_UMASK
+        os.chmod(tmp_name, mode)
+        os.replace(tmp_name, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_name)
+        except FileNotFoundError:
+            pass
+        raise
 
 
 class MemoryStore:
-    def __init__(self):
-        if not MEMORY_FILE.exists():
-            self._write({
-                "user_preferences": {
-                    "location": "Indiranagar, Bangalore",
-                    "food_budget": 200,
-                    "cuisine_preferences": ["South Indian", "Fast Food"],
-                    "class_start_time": "09:00",
-                    "class_location": "IIT Madras",
-                    "timezone": "Asia/Kolkata"
-                },
-                "execution_history": []
-            })
+    def __init__(
+        self,
+        memory_file: Path = MEMORY_FILE,
+        write_behind: bool = MEMORY_WRITE_BEHIND,
+        flush_interval: float = MEMORY_FLUSH_INTERVAL,
+        flush_batch_size: int = MEMORY_FLUSH_BATCH_SIZE,
+        fsync: str = MEMORY_FSYNC
+    ):
+        self.memory_file = Path(memory_file)
+        # agent_memory.json -> agent_memory.history.jsonl
+        self.history_file = self.memory_file.with_suffix(".history.jsonl")
+        # Running aggregates over every execution ever logged, kept next to the journal
+        self.stats_file = self.memory_file.with_suffix(".stats.json")
+        # Compressed history segments that compaction moves out of the journal
+        self.archive_dir = self.memory_file.with_suffix(".archive")
+        self.archive_index_file = self.archive_dir / "index.json"
+        # Advisory lock shared by every worker process using these files
+        self.lock_file = self.memory_file.with_suffix(".lock")
+        self._io_lock = threading.RLock()
+        self._lock_depth = 0
+        self._lock_fd = None
+
+        # Parsed file contents, revalidated against the file signature on every read
+        self._cache: Dict[Path, Tuple[Tuple[int, int, int], Any]] = {}
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+        with self._locked():
+            if not self.memory_file.exists():
+                self._write(self._get_default_memory())
+
+            self._migrate_inline_history()
+
+            if not self.stats_file.exists():
+                self.rebuild_stats()
+
+        # Write-behind: log_execution only queues, a background thread commits in batches
+        self.write_behind = write_behind
+        self.flush_interval = flush_interval
+        self.flush_batch_size = max(1, flush_batch_size)
+        self.fsync = fsync
+        self._pending: List[Dict[str, Any]] = []
+        self._pending_lock = threading.Condition()
+        self._flush_lock = threading.RLock()
+        self._closed = threading.Event()
+        self._flusher = None
+
+        if self.write_behind:
+            self._flusher = threading.Thread(target=self._flush_loop, name="memory-flusher", daemon=True)
+            self._flusher.start()
+
+    @contextmanager
+    def _locked(self):
+        """Hold the cross-process file lock (re-entrant within this store)"""
+        with self._io_lock:
+            self._lock_depth += 1
+            try:
+                if self._lock_depth == 1 and fcntl is not None:
+                    self._lock_fd = open(self.lock_file, "a")
+                    fcntl.flock(self._lock_fd, fcntl.LOCK_EX)
+                yield
+            finally:
+                if self._lock_depth == 1 and self._lock_fd is not None:
+                    fcntl.flock(self._lock_fd, fcntl.LOCK_UN)
+                    self._lock_fd.close()
+                    self._lock_fd = None
+                self._lock_depth -= 1
+
+    def _cached(self, path: Path, loader: Callable[[], Any]) -> Any:
+        """Return the parsed contents of path, re-running loader only if the file changed"""
+        signature = _file_signature(path)
+        cached = self._cache.get(path)
+        if cached is not None and signature is not None and cached[0] == signature:
+            self.cache_hits += 1
+            return cached[1]
+
+        self.cache_misses += 1
+        value = loader()
+        if signature is not None:
+            self._cache[path] = (signature, value)
+        return value
+
+    def _invalidate(self, path: Path) -> None:
+        """Drop the cached contents of path"""
+        self._cache.pop(path, None)
+
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """Get read cache hit/miss counters"""
+        lookups = self.cache_hits + self.cache_misses
+        return {
+            "enabled": True,
+            "hits": self.cache_hits,
+            "misses": self.cache_misses,
+            "hit_rate": round(self.cache_hits / lookups, 4) if lookups else 0,
+            "entries": len(self._cache)
+        }
 
     def _read(self) -> Dict[str, Any]:
-        """Read memory file"""
+        """Read memory file (shared cached copy, do not mutate)"""
+        return self._cached(self.memory_file, self._load)
+
+    def _load(self) -> Dict[str, Any]:
+        """Parse memory file from disk"""
         try:
-            return json.loads(MEMORY_FILE.read_text())
-        except (FileNotFoundError, json.JSONDecodeError):
+            return json.loads(self.memory_file.read_text())
+        except FileNotFoundError:
             return self._get_default_memory()
+        except json.JSONDecodeError as e:
+            # Never silently swap real data for defaults: keep serving the last good copy
+            logger.error("Memory file %s is unreadable: %s", self.memory_file, e)
+            cached = self._cache.get(self.memory_file)
+            return cached[1] if cached else self._get_default_memory()
 
     def _write(self, data: Dict[str, Any]) -> None:
         """Write memory file"""
-        MEMORY_FILE.write_text(json.dumps(data, indent=2, default=str))
+        self._write_json(self.memory_file, data, indent=2)
+
+    def _write_json(self, path: Path, data: Dict[str, Any], indent: Optional[int] = None) -> None:
+        """Atomically write a JSON document and drop its cached copy"""
+        _atomic_write(path, [json.dumps(data, indent=indent, default=str)])
+        self._invalidate(path)
 
     def _get_default_memory(self) -> Dict[str, Any]:
         """Get default memory structure"""
         return {
-            "user_preferences": {
-                "location": "Indiranagar, Bangalore",
-                "food_budget": 200,
-                "cuisine_preferences": ["South Indian", "Fast Food"],
-                "class_start_time": "09:00",
-                "class_location": "IIT Madras",
-                "timezone": "Asia/Kolkata"
-            },
-            "execution_history": []
+            "user_preferences": copy.deepcopy(DEFAULT_USER_PREFERENCES)
         }
 
+    def _migrate_inline_history(self) -> None:
+        """Move execution_history out of the memory file into the journal"""
+        data = dict(self._read())
+        history = data.pop("execution_history", None)
+        if history is None:
+            return
+
+        if history and not self.history_file.exists():
+            self._rewrite_history(history)
+        self._write(data)
+
     def get_user_preferences(self) -> Dict[str, Any]:
         """Get user preferences"""
         data = self._read()
-        return data.get("user_preferences", {})
+        return copy.deepcopy(data.get("user_preferences", {}))
 
     def save_user_preferences(self, prefs: Dict[str, Any]) -> None:
         """Save user preferences"""
-        data = self._read()
-        data["user_preferences"] = prefs
-        self._write(data)
+        with self._locked():
+            data = dict(self._read())
+            data["user_preferences"] = prefs
+            self._write(data)
 
     def log_execution(self, record: Dict[str, Any]) -> None:
-        """Log an execution record"""
-        data = self._read()
-        history = data.get("execution_history", [])
-        
+        """Append an execution record to the journal (queued when write-behind is on)
+
+        The timestamp set here is provisional: it is stamped again when the
+        record is committed, so the journal stays in timestamp order.
+        """
         record["timestamp"] = datetime.now().isoformat()
-        history.append(record)
-        
-        # Keep only last 50 records
-        data["execution_history"] = history[-50:]
-        self._write(data)
+
+        if self.write_behind and not self._closed.is_set():
+            with self._pending_lock:
+                self._pending.append(record)
+                if len(self._pending) >= self.flush_batch_size:
+                    self._pending_lock.notify()
+            return
+
+        with self._flush_lock:
+            self._commit_records([record])
+
+    def _commit_records(self, records: List[Dict[str, Any]]) -> None:
+        """Append a batch of records to the journal with a single write
+
+        Records are timestamped here under the file lock, never earlier than
+        the last committed record, so history cursors can rely on journal
+        order matching time order across workers.
+        """
+        with self._locked():
+            # Re-read under the lock: another worker may have logged since our cached copy
+            stats = self._load_stats()
+            timestamp = max(datetime.now().isoformat(), stats.get("last_timestamp") or "")
+            for record in records:
+                record["timestamp"] = timestamp
+            stats["last_timestamp"] = timestamp
+
+            lines = "".join(json.dumps(record, default=str) + "\n" for record in records)
+            with open(self.history_file, "a", encoding="utf-8") as f:
+                f.write(lines)
+                if self.fsync == "always":
+                    f.flush()
+                    os.fsync(f.fileno())
+            self._invalidate(self.history_file)
+
+            stats["totals"] = add_to_totals(stats["totals"], records)
+            stats["journal_records"] += len(records)
+            self._write_json(self.stats_file, stats)
+
+            if stats["journal_records"] >= HISTORY_RETENTION + HISTORY_COMPACT_EVERY:
+                self.compact_history()
+
+    def compact_history(self) -> None:
+        """Move all but the last HISTORY_RETENTION journal records into the archive"""
+        with self._flush_lock, self._locked():
+            records = self._load_journal()
+            if len(records) <= HISTORY_RETENTION:
+                return
+
+            dropped = records[:-HISTORY_RETENTION]
+            # Archive first: a crash in between can duplicate records, never lose them
+            self._archive_records(dropped)
+            self._rewrite_history(records[-HISTORY_RETENTION:])
+
+            # Archived records still count towards all-time stats
+            stats = self._load_stats()
+            stats["compacted"] = add_to_totals(stats["compacted"], dropped)
+            stats["journal_records"] = HISTORY_RETENTION
+            self._write_json(self.stats_file, stats)
+
+    def _archive_records(self, records: List[Dict[str, Any]]) -> None:
+        """Append records to their gzip segments and update the time index (call locked)"""
+        segments: Dict[str, List[Dict[str, Any]]] = {}
+        for record in records:
+            segments.setdefault(_segment_key(record.get("timestamp")), []).append(record)
+
+        self.archive_dir.mkdir(exist_ok=True)
+        index = self._load_archive_index()
+
+        for key, segment_records in segments.items():
+            entry = index.setdefault(key, {
+                "file": f"{key}.jsonl.gz",
+                "start": None,
+                "end": None,
+                "count": 0,
+                "size": 0
+            })
+            path = self.archive_dir / entry["file"]
+
+            if entry["end"] is not None and min(map(_record_time, segment_records)) < entry["end"]:
+                # Older than what the segment already holds (an import): rewrite it in time order
+                merged = sorted(list(self._iter_segment(entry)) + segment_records, key=_record_time)
+                data = gzip.compress(b"".join(
+                    (json.dumps(record, default=str) + "\n").encode("utf-8") for record in merged
+                ))
+                _atomic_write(path, [data], binary=True)
+                entry.update(start=_record_time(merged[0]), end=_record_time(merged[-1]),
+                             count=len(merged), size=len(data))
+                continue
+
+            # Each append is a new gzip member; readers stop at the size recorded in the index
+            with open(path, "ab") as f:
+                with gzip.GzipFile(fileobj=f, mode="wb") as gz:
+                    for record in segment_records:
+                        gz.write((json.dumps(record, default=str) + "\n").encode("utf-8"))
+                f.flush()
+                os.fsync(f.fileno())
+                entry["size"] = f.tell()
+
+            timestamps = [record.get("timestamp") or "" for record in segment_records]
+            entry["start"] = min(timestamps + ([entry["start"]] if entry["start"] is not None else []))
+            entry["end"] = max(timestamps + ([entry["end"]] if entry["end"] is not None else []))
+            entry["count"] += len(segment_records)
+
+        self._write_json(self.archive_index_file, index, indent=2)
+
+    def _load_archive_index(self) -> Dict[str, Dict[str, Any]]:
+        """Parse the archive time index"""
+        try:
+            return json.loads(self.archive_index_file.read_text())
+        except FileNotFoundError:
+            return {}
+
+    def _iter_segment(self, entry: Dict[str, Any]):
+        """Yield the records of one archive segment, up to its indexed size"""
+        with open(self.archive_dir / entry["file"], "rb") as f:
+            compressed = f.read(entry["size"])
+        with gzip.GzipFile(fileobj=io.BytesIO(compressed)) as gz:
+            for line in gz:
+                if line.strip():
+                    yield json.loads(line)
+
+    def query_history(
+        self,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        cursor: Optional[str] = None,
+        limit: int = 50
+    ) -> Dict[str, Any]:
+        """Page through archived and recent records in time order
+
+        Only archive segments overlapping the requested range are decompressed.
+        """
+        if limit <= 0:
+            raise ValueError(f"Invalid limit: {limit}")
+        since = normalize_time_bound(since)
+        until = normalize_time_bound(until)
+        cursor_time, cursor_seen = parse_history_cursor(cursor)
+        lower = max(filter(None, [since, cursor_time]), default=None)
+
+        # Snapshot index and hot tail together so compaction cannot move records between them.
+        # Queued records are committed first: only committed ones have their final timestamp.
+        with self._flush_lock:
+            self.flush()
+            with self._locked():
+                index = self._load_archive_index()
+                hot = list(self._cached(self.history_file, self._load_history))
+
+        segments = sorted(
+            (entry for entry in index.values()
+             if (lower is None or entry["end"] >= lower) and (until is None or entry["start"] <= until)),
+            key=lambda entry: entry["start"]
+        )
+
+        def candidates():
+            for entry in segments:
+                yield from self._iter_segment(entry)
+            yield from hot
+
+        page: List[Dict[str, Any]] = []
+        skipped_at_cursor = 0
+        for record in candidates():
+            timestamp = record.get("timestamp") or ""
+            if lower is not None and timestamp < lower:
+                continue
+            if until is not None and timestamp > until:
+                continue
+            if timestamp == cursor_time and skipped_at_cursor < cursor_seen:
+                skipped_at_cursor += 1
+                continue
+            page.append(record)
+            if len(page) > limit:
+                break
+
+        next_cursor = None
+        if len(page) > limit:
+            page = page[:limit]
+            last_time = page[-1].get("timestamp") or ""
+            seen = sum(1 for record in page if (record.get("timestamp") or "") == last_time)
+            if last_time == cursor_time:
+                seen += cursor_seen
+            next_cursor = f"{last_time}|{seen}"
+
+        return {"records": page, "next_cursor": next_cursor}
+
+    def _rewrite_history(self, records: List[Dict[str, Any]]) -> None:
+        """Atomically replace the journal with the given records"""
+        _atomic_write(self.history_file, (json.dumps(record, default=str) + "\n" for record in records))
+        self._invalidate(self.history_file)
+
+    def import_executions(self, records: List[Dict[str, Any]]) -> None:
+        """Merge already-timestamped records (migrations) into history in time order
+
+        Imported records are usually older than the journal, so they are not
+        appended to it: the journal and the import are merged by timestamp,
+        and whatever predates the newest archived record or falls outside
+        the retention window goes into the archive segments.
+        """
+        if not records:
+            return
+
+        with self._flush_lock, self._locked():
+            stats = self._load_stats()
+            merged = sorted(self._load_journal() + list(records), key=_record_time)
+            archive_end = max((entry["end"] or "" for entry in self._load_archive_index().values()), default="")
+            cut = max(
+                0,
+                len(merged) - HISTORY_RETENTION,
+                sum(1 for record in merged if _record_time(record) < archive_end)
+            )
+
+            # Archive first: a crash in between can duplicate records, never lose them
+            if cut:
+                self._archive_records(merged[:cut])
+            self._rewrite_history(merged[cut:])
+
+            stats["totals"] = add_to_totals(stats["totals"], records)
+            stats["compacted"] = add_to_totals(stats["compacted"], merged[:cut])
+            stats["journal_records"] = len(merged) - cut
+            stats["last_timestamp"] = max(stats.get("last_timestamp") or "", _record_time(merged[-1]))
+            self._write_json(self.stats_file, stats)
+
+    def flush(self) -> int:
+        """Commit every queued record now, returns how many were written"""
+        written = 0
+        with self._flush_lock:
+            while True:
+                with self._pending_lock:
+                    batch = self._pending[:self.flush_batch_size]
+                if not batch:
+                    return written
+
+                self._commit_records(batch)
+                with self._pending_lock:
+                    del self._pending[:len(batch)]
+                written += len(batch)
+
+    def _flush_loop(self) -> None:
+        """Background flusher: commit whenever a batch fills up or the interval passes"""
+        while not self._closed.is_set():
+            with self._pending_lock:
+                if len(self._pending) < self.flush_batch_size:
+                    self._pending_lock.wait(self.flush_interval)
+            try:
+                self.flush()
+            except Exception as e:
+                # Records stay queued and are retried on the next pass
+                logger.error("Memory flush error: %s", e)
+
+    def close(self) -> None:
+        """Stop the background flusher and drain the queue"""
+        self._closed.set()
+        if self._flusher is not None:
+            with self._pending_lock:
+                self._pending_lock.notify()
+            self._flusher.join()
+            self._flusher = None
+        self.flush()
+
+    def _pending_records(self) -> List[Dict[str, Any]]:
+        """Snapshot of queued records (call with _flush_lock held)"""
+        with self._pending_lock:
+            return list(self._pending)
 
     def get_execution_history(self, limit: int = 10) -> List[Dict[str, Any]]:
-        """Get execution history"""
-        data = self._read()
-        history = data.get("execution_history", [])
+        """Get the most recent execution records, oldest first"""
+        if limit <= 0:
+            return []
+        with self._flush_lock:
+            history = self._cached(self.history_file, self._load_history)
+            pending = self._pending_records()
+        if pending:
+            history = history + pending
         return history[-limit:]
 
+    def _load_history(self) -> List[Dict[str, Any]]:
+        """Parse the journal tail; it never holds more than retention + one compaction window"""
+        try:
+            lines = _read_tail_lines(self.history_file, HISTORY_RETENTION + HISTORY_COMPACT_EVERY)
+        except FileNotFoundError:
+            return []
+
+        return _parse_lines(lines)
+
+    def _load_journal(self) -> List[Dict[str, Any]]:
+        """Parse the whole journal"""
+        try:
+            with open(self.history_file, "rb") as f:
+                return _parse_lines([line for line in f if line.strip()])
+        except FileNotFoundError:
+            return []
+
+    def _read_stats(self) -> Dict[str, Any]:
+        """Read the running aggregates (shared cached copy, do not mutate)"""
+        return self._cached(self.stats_file, self._load_stats)
+
+    def _load_stats(self) -> Dict[str, Any]:
+        """Parse the stats file from disk"""
+        try:
+            return json.loads(self.stats_file.read_text())
+        except FileNotFoundError:
+            return {"totals": empty_totals(), "compacted": empty_totals(), "journal_records": 0}
+        except json.JSONDecodeError as e:
+            # Zeros would silently reset the all-time totals: recount them from the raw history
+            logger.error("Stats file %s is unreadable, rebuilding it: %s", self.stats_file, e)
+            return self._recount_stats()
+
     def get_stats(self) -> Dict[str, Any]:
-        """Get usage statistics"""
-        history = self.get_execution_history(limit=100)
-        
-        total_executions = len(history)
-        successful = len([h for h in history if h.get("confidence", 0) >= 0.6])
-        average_confidence = (
-            sum(h.get("confidence", 0) for h in history) / len(history)
-            if history else 0
-        )
-        
-        return {
-            "total_executions": total_executions,
-            "successful": successful,
-            "success_rate": (successful / total_executions * 100) if total_executions else 0,
-            "average_confidence": round(average_confidence, 2)
-        }
+        """Get all-time usage statistics from the running aggregates"""
+        with self._flush_lock:
+            totals = self._read_stats()["totals"]
+            pending = self._pending_records()
+        if pending:
+            totals = add_to_totals(dict(totals), pending)
+        return format_stats(totals)
+
+    def rebuild_stats(self) -> Dict[str, Any]:
+        """Recompute the running aggregates from the archive segments and the journal"""
+        return format_stats(self._recount_stats()["totals"])
+
+    def _recount_stats(self) -> Dict[str, Any]:
+        """Count every archived and journal record again and save the result as the stats file"""
+        with self._locked():
+            compacted = empty_totals()
+            last_timestamp = ""
+            for entry in self._load_archive_index().values():
+                try:
+                    add_to_totals(compacted, self._iter_segment(entry))
+                except FileNotFoundError:
+                    logger.error("Archive segment %s is missing, its records are not counted", entry["file"])
+                    continue
+                last_timestamp = max(last_timestamp, entry["end"] or "")
+            records = self._load_journal()
+
+            stats = {
+                "totals": add_to_totals(dict(compacted), records),
+                "compacted": compacted,
+                "journal_records": len(records),
+                "last_timestamp": max(
+                    [last_timestamp] + [record.get("timestamp") or "" for record in records]
+                )
+            }
+            self._write_json(self.stats_file, stats)
+        return stats
+
+
+def shard_memory_file(user_id: str) -> Path:
+    """Memory file for one user; the default user keeps the original agent_memory.json"""
+    user_id = validate_user_id(user_id)
+    if user_id == DEFAULT_USER_ID:
+        return MEMORY_FILE
+    shard_dir = MEMORY_SHARD_DIR / user_id
+    shard_dir.mkdir(parents=True, exist_ok=True)
+    return shard_dir / MEMORY_FILE.name
+
 
+def create_memory_store(backend: str = MEMORY_BACKEND) -> ShardedMemoryStore:
+    """Create the per-user memory store selected by MEMORY_BACKEND"""
+    if backend == "sqlite":
+        # Imported lazily so the JSON backend works without sqlalchemy installed
+        from app.memory.sqlite_store import SQLiteMemoryStore
+        db_url = MEMORY_DB_URL or f"sqlite:///{MEMORY_DB_FILE}"
+        return ShardedMemoryStore(lambda user_id: SQLiteMemoryStore(db_url, user_id=user_id))
+    return ShardedMemoryStore(lambda user_id: MemoryStore(shard_memory_file(user_id)))
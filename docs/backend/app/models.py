@@ -1,4 +1,6 @@
-from typing import Optional, List, Dict, Any
+import sys
+from operator import itemgetter
+from typing import Optional, List, Dict, Any, NamedTuple, Sequence
 from pydantic import BaseModel
 from datetime import datetime
 
@@ -51,3 +53,90 @@ class AgentDecision(BaseModel):
     recommended_travel: Optional[TravelOption]
     message: Optional[str]
     reasoning: Dict[str, Any]
+
+
+# ===============================
+# INTERNAL OPTION RECORDS
+# ===============================
+# Providers, caches and agents pass these compact immutable tuples around;
+# the pydantic models above are only for validating API payloads.
+
+class FoodQuote(NamedTuple):
+    restaurant: str
+    item: str
+    price: float
+    eta_minutes: int
+    eta_variance: float
+    rating: float
+    service: str  # "Swiggy" or "Zomato"
+
+
+class TravelQuote(NamedTuple):
+    service: str  # "Ola" or "Uber"
+    mode: str  # "Ride", "Premium", "XL"
+    cost: float
+    eta_minutes: int
+    eta_variance: float
+    rating: float
+
+
+def make_food_quote(restaurant: str, item: str, price: float, eta_minutes: int,
+                    eta_variance: float, rating: float, service: str) -> FoodQuote:
+    """Build a FoodQuote with interned strings and normalised numbers"""
+    return FoodQuote(
+        sys.intern(str(restaurant)), sys.intern(str(item)), float(price), int(eta_minutes),
+        float(eta_variance), float(rating), sys.intern(str(service))
+    )
+
+
+def make_travel_quote(service: str, mode: str, cost: float, eta_minutes: int,
+                      eta_variance: float, rating: float) -> TravelQuote:
+    """Build a TravelQuote with interned strings and normalised numbers"""
+    return TravelQuote(
+        sys.intern(str(service)), sys.intern(str(mode)), float(cost), int(eta_minutes),
+        float(eta_variance), float(rating)
+    )
+
+
+_row_builders: Dict[tuple, Any] = {}
+
+
+def _row_builder(record_type, fields: Sequence[str], with_id: bool):
+    """An (id, record) -> dict function for one record type and field list.
+
+    Fields are picked by tuple position with one itemgetter call, which keeps
+    a single definition of each response shape without per-field lookups.
+    """
+    key = (record_type, tuple(fields), with_id)
+    builder = _row_builders.get(key)
+    if builder is None:
+        names = tuple(fields)
+        pick = itemgetter(*[record_type._fields.index(name) for name in names])
+        if len(names) == 1:
+            pick_one = pick
+            pick = lambda rec: (pick_one(rec),)
+
+        if with_id:
+            def builder(i, rec):
+                row = {"id": i}
+                row.update(zip(names, pick(rec)))
+                return row
+        else:
+            def builder(i, rec):
+                return dict(zip(names, pick(rec)))
+        _row_builders[key] = builder
+    return builder
+
+
+def serialize_option(option: NamedTuple, fields: Optional[Sequence[str]] = None) -> Dict[str, Any]:
+    """One option record as a response dict, limited to fields"""
+    return _row_builder(type(option), fields or option._fields, False)(None, option)
+
+
+def serialize_options(options: Sequence[NamedTuple], fields: Optional[Sequence[str]] = None,
+                      with_id: bool = True) -> List[Dict[str, Any]]:
+    """Option records as response dicts, with their list position as "id" """
+    if not options:
+        return []
+    build = _row_builder(type(options[0]), fields or options[0]._fields, with_id)
+    return [build(i, opt) for i, opt in enumerate(options)]
@@ -0,0 +1,182 @@
+"""
+Per-provider circuit breakers
+A breaker watches the recent failure rate of one provider. When it trips, calls
+fail fast with CircuitOpenError (callers fall back to mock data) instead of
+waiting out a timeout; after a cool-down a few trial calls decide whether to
+close it again.
+
+closed    -> open       failure rate over the window reaches the threshold
+open      -> half_open  open_seconds have passed
+half_open -> closed     every trial call succeeded
+half_open -> open       any trial call failed
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, Optional
+
+from app.config import (
+    CIRCUIT_FAILURE_RATE, CIRCUIT_WINDOW_SIZE, CIRCUIT_WINDOW_SECONDS,
+    CIRCUIT_MIN_CALLS, CIRCUIT_OPEN_SECONDS, CIRCUIT_HALF_OPEN_CALLS
+)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a provider whose circuit is open"""
+
+    def __init__(self, name: str, retry_in: float):
+        super().__init__(f"{name} circuit is open, retry in {retry_in:.1f}s")
+        self.name = name
+        self.retry_in = retry_in
+
+
+class CircuitBreaker:
+    def __init__(self, name: str, failure_rate: float = CIRCUIT_FAILURE_RATE,
+                 window_size: int = CIRCUIT_WINDOW_SIZE, window_seconds: float = CIRCUIT_WINDOW_SECONDS,
+                 min_calls: int = CIRCUIT_MIN_CALLS, open_seconds: float = CIRCUIT_OPEN_SECONDS,
+                 half_open_calls: int = CIRCUIT_HALF_OPEN_CALLS):
+        self.name = name
+        self.failure_rate = failure_rate
+        self.window_seconds = window_seconds
+        self.min_calls = min_calls
+        self.open_seconds = open_seconds
+        self.half_open_calls = half_open_calls
+
+        # (monotonic time, succeeded) for the last window_size calls
+        self._window = deque(maxlen=window_size)
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._trials_in_flight = 0
+        self._trial_successes = 0
+        # Bumped each time the circuit goes half-open, so a trial from an earlier round is not counted
+        self._half_open_round = 0
+        self._lock = threading.Lock()
+        self._counters = {"calls": 0, "failures": 0, "rejected": 0, "opened": 0}
+
+    def _prune(self, now: float) -> None:
+        while self._window and now - self._window[0][0] > self.window_seconds:
+            self._window.popleft()
+
+    def _update_state(self, now: float) -> None:
+        if self._state == OPEN and now - self._opened_at >= self.open_seconds:
+            self._state = HALF_OPEN
+            self._half_open_round += 1
+            self._trials_in_flight = 0
+            self._trial_successes = 0
+
+    def _is_trial(self, token: Optional[int]) -> bool:
+        """Was the call behind this reservation admitted as a trial of the current half-open round"""
+        return token is not None and self._state == HALF_OPEN and token == self._half_open_round
+
+    def _trip(self, now: float) -> None:
+        self._state = OPEN
+        self._opened_at = now
+        self._counters["opened"] += 1
+        print(f"Circuit for {self.name} opened")
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            self._update_state(time.monotonic())
+            return self._state
+
+    def before_call(self) -> Optional[int]:
+        """Reserve a call, raising CircuitOpenError if the provider should not be tried
+
+        Returns the reservation token to hand back to record_success,
+        record_failure or release: the half-open round when the call was
+        admitted as a trial, None for an ordinary call.
+        """
+        now = time.monotonic()
+        with self._lock:
+            self._update_state(now)
+            if self._state == OPEN:
+                self._counters["rejected"] += 1
+                raise CircuitOpenError(self.name, self.open_seconds - (now - self._opened_at))
+            if self._state == HALF_OPEN:
+                if self._trials_in_flight >= self.half_open_calls:
+                    self._counters["rejected"] += 1
+                    raise CircuitOpenError(self.name, 0.0)
+                self._trials_in_flight += 1
+                self._counters["calls"] += 1
+                return self._half_open_round
+            self._counters["calls"] += 1
+            return None
+
+    def record_success(self, token: Optional[int] = None) -> None:
+        now = time.monotonic()
+        with self._lock:
+            if self._is_trial(token):
+                self._trials_in_flight -= 1
+                self._trial_successes += 1
+                if self._trial_successes >= self.half_open_calls:
+                    self._state = CLOSED
+                    self._window.clear()
+                    print(f"Circuit for {self.name} closed")
+                return
+            # A call reserved before the circuit opened says nothing about the trials
+            if self._state == CLOSED:
+                self._window.append((now, True))
+
+    def record_failure(self, token: Optional[int] = None) -> None:
+        now = time.monotonic()
+        with self._lock:
+            self._counters["failures"] += 1
+            if self._is_trial(token):
+                self._trials_in_flight -= 1
+                self._trip(now)
+                return
+            if self._state != CLOSED:
+                return
+            self._window.append((now, False))
+            self._prune(now)
+            failures = sum(1 for _, ok in self._window if not ok)
+            if len(self._window) >= self.min_calls and failures / len(self._window) >= self.failure_rate:
+                self._trip(now)
+
+    def release(self, token: Optional[int] = None) -> None:
+        """Give back a reserved call that finished without a verdict (e.g. it was cancelled)"""
+        with self._lock:
+            if self._is_trial(token) and self._trials_in_flight > 0:
+                self._trials_in_flight -= 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        with self._lock:
+            self._update_state(now)
+            self._prune(now)
+            window = len(self._window)
+            failures = sum(1 for _, ok in self._window if not ok)
+            stats = {
+                "state": self._state,
+                "window_calls": window,
+                "window_failure_rate": round(failures / window, 3) if window else 0.0,
+                **self._counters
+            }
+            if self._state == OPEN:
+                stats["retry_in_seconds"] = round(self.open_seconds - (now - self._opened_at), 1)
+        return stats
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(name: str) -> CircuitBreaker:
+    """The shared breaker for a provider, created on first use"""
+    with _breakers_lock:
+        breaker = _breakers.get(name)
+        if breaker is None:
+            breaker = _breakers[name] = CircuitBreaker(name)
+        return breaker
+
+
+def get_breaker_stats() -> Dict[str, Dict[str, Any]]:
+    with _breakers_lock:
+        breakers = list(_breakers.values())
+    return {breaker.name: breaker.get_stats() for breaker in breakers}
@@ -0,0 +1,92 @@
+"""
+Concurrent provider aggregation
+Queries every enabled provider in the registry at once and merges whatever
+arrived within the deadline, so a plan costs the slowest provider rather than
+the sum. Providers that are late, fail or return nothing contribute their mock
+catalogue entries instead.
+"""
+
+import asyncio
+import time
+from typing import Any, Dict, List, Optional, Sequence
+
+from app.config import PROVIDER_FANOUT_DEADLINE, USER_LATITUDE, USER_LONGITUDE
+from app.deadline import Deadline, stage
+from app.models import FoodQuote, TravelQuote
+from app.tools.providers import FOOD, TRAVEL, get_providers
+from app.tools.food_service_mock import filter_food_options
+from app.tools.travel_service_mock import merge_travel_options
+
+
+async def fetch_all_options(budget: int = 200,
+                            start_lat: float = None, start_lon: float = None,
+                            end_lat: float = None, end_lon: float = None,
+                            timeout: Optional[float] = None,
+                            deadline: Optional[Deadline] = None,
+                            kinds: Sequence[str] = (FOOD, TRAVEL)) -> Dict[str, Any]:
+    """Fetch food and travel options from all enabled providers concurrently.
+
+    Waits at most timeout seconds (PROVIDER_FANOUT_DEADLINE by default), and
+    never longer than what is left of the request deadline.
+    """
+    start_lat = start_lat or USER_LATITUDE
+    start_lon = start_lon or USER_LONGITUDE
+    end_lat = end_lat or 12.9914  # IIT Madras
+    end_lon = end_lon or 80.2303
+    wait = PROVIDER_FANOUT_DEADLINE if timeout is None else timeout
+    if deadline is not None:
+        wait = deadline.timeout(wait)
+
+    providers = [p for p in get_providers(capability="quotes") if p.kind in kinds]
+    modes = {p.name: p.mode for p in providers}
+    tasks = {
+        asyncio.ensure_future(p.fetch_async(budget, start_lat, start_lon, end_lat, end_lon)): p
+        for p in providers if modes[p.name] == "real"
+    }
+
+    started = time.perf_counter()
+    pending = set()
+    if tasks:
+        with stage(deadline, "providers") as providers_stage:
+            _, pending = await asyncio.wait(tasks.keys(), timeout=max(wait, 0))
+            for task in pending:
+                task.cancel()
+            if pending:
+                providers_stage.cut("late: " + ", ".join(sorted(tasks[t].name for t in pending)))
+
+    fetched: Dict[str, List[Any]] = {}
+    late: List[str] = []
+    failed: List[str] = []
+    for task, provider in tasks.items():
+        if task in pending:
+            late.append(provider.name)
+        elif task.exception() is not None:
+            print(f"Error fetching {provider.name} data: {task.exception()}")
+            failed.append(provider.name)
+        else:
+            fetched[provider.name] = task.result()
+
+    # Registration order decides list order; empty, late and failed providers use their mock entries
+    results: Dict[str, List[List[Any]]] = {FOOD: [], TRAVEL: []}
+    for provider in providers:
+        results[provider.kind].append(fetched.get(provider.name) or provider.mock_options())
+
+    food_options: List[FoodQuote] = []
+    travel_options: List[TravelQuote] = []
+    if FOOD in kinds:
+        food_options = filter_food_options([opt for opts in results[FOOD] for opt in opts], budget)
+    if TRAVEL in kinds:
+        travel_options = merge_travel_options(*results[TRAVEL])
+
+    return {
+        "food_options": food_options,
+        "travel_options": travel_options,
+        "report": {
+            "wait_seconds": round(wait, 3),
+            "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+            "modes": modes,
+            "on_time": sorted(fetched),
+            "late": sorted(late),
+            "failed": sorted(failed)
+        }
+    }
@@ -1,121 +1,177 @@
-import requests
+from app.tools import http_client
+from app.tools.quote_cache import quote_cache, quote_key
+from app.tools.circuit_breaker import get_breaker
+from app.tools.rate_limiter import get_limiter
+from app.tools.providers import Provider, FOOD, collect_options, register_provider
 from typing import List, Dict, Any
 from app.config import USE_MOCK_SERVICES, ZOMATO_API_KEY, USER_LATITUDE, USER_LONGITUDE
-from app.models import FoodOption
+from app.config import ZOMATO_API_BASE
+from app.models import FoodQuote, make_food_quote
 
-def get_zomato_restaurants(cuisine: str = "South Indian", budget: int = 200) -> List[FoodOption]:
-    """Fetch restaurants from Zomato API"""
-    if not ZOMATO_API_KEY or USE_MOCK_SERVICES:
-        return get_mock_food_options()
-    
-    try:
-        headers = {"api_key": ZOMATO_API_KEY}
-        params = {
+ZOMATO_BREAKER = get_breaker("zomato")
+ZOMATO_LIMITER = get_limiter("zomato", ZOMATO_API_KEY)
+
+ZOMATO_SEARCH_URL = f"{ZOMATO_API_BASE}/api/v2.1/search"
+
+
+def build_zomato_request() -> Dict[str, Any]:
+    """Request arguments for a Zomato search around the user"""
+    return {
+        "method": "GET",
+        "url": ZOMATO_SEARCH_URL,
+        "headers": {"api_key": ZOMATO_API_KEY},
+        "params": {
             "lat": USER_LATITUDE,
             "lon": USER_LONGITUDE,
             "radius": 2000,
             "sort": "rating",
             "order": "desc"
         }
-        
-        response = requests.get(
-            "https://api.zomato.com/api/v2.1/search",
-            headers=headers,
-            params=params,
-            timeout=5
+    }
+
+
+def parse_zomato_response(data: Dict[str, Any]) -> List[FoodQuote]:
+    """Turn a Zomato search response into food options"""
+    options = []
+    for rest_data in data.get("restaurants", [])[:5]:
+        rest = rest_data.get("restaurant", {})
+        option = make_food_quote(
+            restaurant=rest.get("name", "Unknown"),
+            item="Recommended Item",
+            price=rest.get("average_cost_for_two", 200) / 2,
+            eta_minutes=int(rest.get("delivery_time", 30)),
+            eta_variance=2.0,
+            rating=float(rest.get("user_rating", {}).get("aggregate_rating", 4.0)),
+            service="Zomato"
         )
-        
-        if response.status_code == 200:
-            restaurants = response.json().get("restaurants", [])
-            options = []
-            
-            for rest_data in restaurants[:5]:
-                rest = rest_data.get("restaurant", {})
-                option = FoodOption(
-                    restaurant=rest.get("name", "Unknown"),
-                    item="Recommended Item",
-                    price=rest.get("average_cost_for_two", 200) / 2,
-                    eta_minutes=int(rest.get("delivery_time", 30)),
-                    eta_variance=2.0,
-                    rating=float(rest.get("user_rating", {}).get("aggregate_rating", 4.0)),
-                    service="Zomato"
-                )
-                options.append(option)
-            
-            return options if options else get_mock_food_options()
-        
+        options.append(option)
+    return options
+
+
+def fetch_zomato_restaurants(budget: int = 200) -> List[FoodQuote]:
+    """Call Zomato and parse the result (raises on any failure)"""
+    def fetch():
+        req = build_zomato_request()
+        response = http_client.request(
+            req["method"],
+            req["url"],
+            headers=req["headers"],
+            params=req["params"],
+            timeout=http_client.DEFAULT_TIMEOUT,
+            breaker=ZOMATO_BREAKER,
+            limiter=ZOMATO_LIMITER
+        )
+        if response.status_code != 200:
+            raise http_client.ProviderError("Zomato", response.status_code)
+        return parse_zomato_response(response.json())
+
+    return quote_cache.get(quote_key("zomato", USER_LATITUDE, USER_LONGITUDE, budget=budget), fetch)
+
+
+async def fetch_zomato_restaurants_async(budget: int = 200) -> List[FoodQuote]:
+    """Async variant of fetch_zomato_restaurants"""
+    async def fetch():
+        req = build_zomato_request()
+        status, data = await http_client.request_json_async(
+            req["method"], req["url"], headers=req["headers"], params=req["params"],
+            breaker=ZOMATO_BREAKER,
+            limiter=ZOMATO_LIMITER
+        )
+        if status != 200:
+            raise http_client.ProviderError("Zomato", status)
+        return parse_zomato_response(data)
+
+    return await quote_cache.get_async(quote_key("zomato", USER_LATITUDE, USER_LONGITUDE, budget=budget), fetch)
+
+
+def get_zomato_restaurants(cuisine: str = "South Indian", budget: int = 200) -> List[FoodQuote]:
+    """Fetch restaurants from Zomato API"""
+    if not ZOMATO_API_KEY or USE_MOCK_SERVICES:
+        return get_mock_food_options()
+    
+    try:
+        options = fetch_zomato_restaurants(budget)
+        return options if options else get_mock_food_options()
     except Exception as e:
         print(f"Error fetching Zomato data: {e}")
     
     return get_mock_food_options()
 
 
-def get_swiggy_restaurants(cuisine: str = "South Indian", budget: int = 200) -> List[FoodOption]:
+def get_swiggy_restaurants(cuisine: str = "South Indian", budget: int = 200) -> List[FoodQuote]:
     """Fetch restaurants from Swiggy"""
     return get_mock_food_options()
 
 
-def get_mock_food_options() -> List[FoodOption]:
+MOCK_FOOD_CATALOG = (
+    make_food_quote(
+        restaurant="Sangeetha Veg Restaurant",
+        item="Idli + Sambar + Chutney",
+        price=110,
+        eta_minutes=12,
+        eta_variance=2,
+        rating=4.6,
+        service="Swiggy"
+    ),
+    make_food_quote(
+        restaurant="MTR (Madras Tiffin Restaurant)",
+        item="Set Dosa + Sambar",
+        price=130,
+        eta_minutes=15,
+        eta_variance=3,
+        rating=4.8,
+        service="Zomato"
+    ),
+    make_food_quote(
+        restaurant="Aachi Biryani",
+        item="Chicken Biryani + Raita",
+        price=180,
+        eta_minutes=18,
+        eta_variance=4,
+        rating=4.5,
+        service="Swiggy"
+    ),
+    make_food_quote(
+        restaurant="Dindigul Thalapakatti",
+        item="Mutton Biryani Special",
+        price=200,
+        eta_minutes=20,
+        eta_variance=2,
+        rating=4.7,
+        service="Zomato"
+    ),
+    make_food_quote(
+        restaurant="Kaldan Continental",
+        item="Chole Bhature + Lassi",
+        price=150,
+        eta_minutes=16,
+        eta_variance=3,
+        rating=4.4,
+        service="Swiggy"
+    ),
+    make_food_quote(
+        restaurant="Saravana Bhavan",
+        item="Puri + Masala + Dosa",
+        price=120,
+        eta_minutes=13,
+        eta_variance=2,
+        rating=4.5,
+        service="Zomato"
+    ),
+)
+
+
+def get_mock_food_options() -> List[FoodQuote]:
     """Return mock food options for Chennai context - realistic variety"""
-    return [
-        FoodOption(
-            restaurant="Sangeetha Veg Restaurant",
-            item="Idli + Sambar + Chutney",
-            price=110,
-            eta_minutes=12,
-            eta_variance=2,
-            rating=4.6,
-            service="Swiggy"
-        ),
-        FoodOption(
-            restaurant="MTR (Madras Tiffin Restaurant)",
-            item="Set Dosa + Sambar",
-            price=130,
-            eta_minutes=15,
-            eta_variance=3,
-            rating=4.8,
-            service="Zomato"
-        ),
-        FoodOption(
-            restaurant="Aachi Biryani",
-            item="Chicken Biryani + Raita",
-            price=180,
-            eta_minutes=18,
-            eta_variance=4,
-            rating=4.5,
-            service="Swiggy"
-        ),
-        FoodOption(
-            restaurant="Dindigul Thalapakatti",
-            item="Mutton Biryani Special",
-            price=200,
-            eta_minutes=20,
-            eta_variance=2,
-            rating=4.7,
-            service="Zomato"
-        ),
-        FoodOption(
-            restaurant="Kaldan Continental",
-            item="Chole Bhature + Lassi",
-            price=150,
-            eta_minutes=16,
-            eta_variance=3,
-            rating=4.4,
-            service="Swiggy"
-        ),
-        FoodOption(
-            restaurant="Saravana Bhavan",
-            item="Puri + Masala + Dosa",
-            price=120,
-            eta_minutes=13,
-            eta_variance=2,
-            rating=4.5,
-            service="Zomato"
-        ),
-    ]
+    return list(MOCK_FOOD_CATALOG)
 
 
-def get_food_option(cuisine: str = "South Indian") -> FoodOption:
+def mock_food_options_for(service: str) -> List[FoodQuote]:
+    """The mock catalogue entries of one service"""
+    return [opt for opt in MOCK_FOOD_CATALOG if opt.service == service]
+
+
+def get_food_option(cuisine: str = "South Indian") -> FoodQuote:
     """Get a single recommended food option"""
     options = get_zomato_restaurants(cuisine)
     if options:
@@ -123,13 +179,36 @@ def get_food_option(cuisine: str = "South Indian") -> FoodOption:
     return get_mock_food_options()[0]
 
 
-def get_all_food_options(budget: int = 200) -> List[FoodOption]:
-    """Get multiple food options within budget"""
-    all_options = get_zomato_restaurants(budget=budget)
-    
-    # Filter by budget
+def filter_food_options(all_options: List[FoodQuote], budget: int) -> List[FoodQuote]:
+    """Keep options within budget, falling back to the mock menu"""
     filtered = [opt for opt in all_options if opt.price <= budget]
-    
     return filtered if filtered else get_mock_food_options()
 
 
+def get_all_food_options(budget: int = 200) -> List[FoodQuote]:
+    """Get multiple food options within budget from every enabled provider"""
+    all_options = [opt for options in collect_options(FOOD, budget) for opt in options]
+    
+    # Filter by budget
+    return filter_food_options(all_options, budget)
+
+
+register_provider(Provider(
+    "zomato", FOOD, "Zomato",
+    mock_options=lambda: mock_food_options_for("Zomato"),
+    fetch_async=lambda budget, *route: fetch_zomato_restaurants_async(budget),
+    fetch=lambda budget, *route: fetch_zomato_restaurants(budget),
+    api_key=ZOMATO_API_KEY,
+    capabilities=("quotes", "ratings"),
+    cost_per_call=0.0,
+    latency_class="medium"
+))
+
+# Swiggy has no public API; its catalogue entries only appear in mock mode
+register_provider(Provider(
+    "swiggy", FOOD, "Swiggy",
+    mock_options=lambda: mock_food_options_for("Swiggy"),
+    capabilities=("quotes", "ratings"),
+    latency_class="fast",
+    mock_only=True
+))
@@ -0,0 +1,266 @@
+"""
+Shared HTTP client for provider integrations
+Every provider call goes through one keep-alive session with a connection
+pool per host, instead of a fresh TCP+TLS handshake per requests.get/post.
+"""
+
+import asyncio
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from app.tools.circuit_breaker import CircuitBreaker
+from app.tools.rate_limiter import RateLimitedError, TokenBucket, parse_retry_after
+from app.config import (
+    PROVIDER_POOL_SIZE, PROVIDER_POOL_HOSTS,
+    PROVIDER_CONNECT_TIMEOUT, PROVIDER_READ_TIMEOUT, PROVIDER_BOOKING_TIMEOUT
+)
+
+DEFAULT_TIMEOUT = (PROVIDER_CONNECT_TIMEOUT, PROVIDER_READ_TIMEOUT)
+BOOKING_TIMEOUT = (PROVIDER_CONNECT_TIMEOUT, PROVIDER_BOOKING_TIMEOUT)
+
+
+class ProviderError(Exception):
+    """A provider answered, but not with a usable 200 response"""
+
+    def __init__(self, provider: str, status: int):
+        super().__init__(f"{provider} returned HTTP {status}")
+        self.provider = provider
+        self.status = status
+
+
+_session = None
+_adapter = None
+_session_lock = threading.Lock()
+
+# One aiohttp session per event loop, each closed on its own loop
+_async_sessions: Dict[Any, Any] = {}
+_async_guards: Dict[Any, Any] = {}
+_async_lock = threading.Lock()
+
+_host_counters: Dict[str, Dict[str, int]] = {}
+_counters_lock = threading.Lock()
+
+
+def get_session() -> requests.Session:
+    """The process-wide pooled session, created on first use"""
+    global _session, _adapter
+    with _session_lock:
+        if _session is None:
+            _adapter = HTTPAdapter(
+                pool_connections=PROVIDER_POOL_HOSTS,
+                pool_maxsize=PROVIDER_POOL_SIZE,
+                max_retries=0
+            )
+            session = requests.Session()
+            session.mount("https://", _adapter)
+            session.mount("http://", _adapter)
+            _session = session
+        return _session
+
+
+def _count(host: str, error: bool) -> None:
+    with _counters_lock:
+        counters = _host_counters.setdefault(host, {"requests": 0, "errors": 0})
+        counters["requests"] += 1
+        if error:
+            counters["errors"] += 1
+
+
+def _is_server_error(status: int) -> bool:
+    return status >= 500
+
+
+def _throttled(limiter: TokenBucket, breaker: Optional[CircuitBreaker], reservation: Optional[int],
+               retry_after_header: Optional[str]) -> RateLimitedError:
+    """Handle a 429: slow every process on this key down; a throttle is not a provider failure"""
+    if breaker is not None:
+        breaker.release(reservation)
+    retry_after = parse_retry_after(retry_after_header)
+    limiter.penalize(retry_after)
+    return RateLimitedError(limiter.name, retry_after)
+
+
+def _acquire(limiter: Optional[TokenBucket], breaker: Optional[CircuitBreaker],
+             reservation: Optional[int]) -> None:
+    """Wait for a rate limit token; a local throttle does not count against the breaker either"""
+    if limiter is None:
+        return
+    try:
+        limiter.acquire()
+    except BaseException:
+        if breaker is not None:
+            breaker.release(reservation)
+        raise
+
+
+async def _acquire_async(limiter: Optional[TokenBucket], breaker: Optional[CircuitBreaker],
+                         reservation: Optional[int]) -> None:
+    if limiter is None:
+        return
+    try:
+        await limiter.acquire_async()
+    except BaseException:
+        if breaker is not None:
+            breaker.release(reservation)
+        raise
+
+
+def request(method: str, url: str, timeout=None, breaker: Optional[CircuitBreaker] = None,
+            limiter: Optional[TokenBucket] = None, **kwargs) -> requests.Response:
+    """Send a request on the pooled session (raises requests exceptions like requests.request).
+
+    With a breaker, an open circuit raises CircuitOpenError before any I/O, and
+    transport errors or 5xx responses count against the provider. With a
+    limiter, the call waits briefly for a token and raises RateLimitedError
+    when none comes or the provider answers 429.
+    """
+    host = urlsplit(url).netloc
+    # The breaker's reservation token, so the outcome is counted against the right state
+    reservation = breaker.before_call() if breaker is not None else None
+    _acquire(limiter, breaker, reservation)
+    try:
+        response = get_session().request(method, url, timeout=timeout or DEFAULT_TIMEOUT, **kwargs)
+    except requests.RequestException:
+        _count(host, error=True)
+        if breaker is not None:
+            breaker.record_failure(reservation)
+        raise
+    except BaseException:
+        if breaker is not None:
+            breaker.release(reservation)
+        raise
+    _count(host, error=False)
+    if limiter is not None and response.status_code == 429:
+        raise _throttled(limiter, breaker, reservation, response.headers.get("Retry-After"))
+    if breaker is not None:
+        if _is_server_error(response.status_code):
+            breaker.record_failure(reservation)
+        else:
+            breaker.record_success(reservation)
+    return response
+
+
+def get(url: str, **kwargs) -> requests.Response:
+    return request("GET", url, **kwargs)
+
+
+def post(url: str, **kwargs) -> requests.Response:
+    return request("POST", url, **kwargs)
+
+
+async def _close_with_loop(session):
+    """Parked on the session's event loop until loop.shutdown_asyncgens() (run by
+    asyncio.run on exit) finalizes it, which closes the session while its loop still runs"""
+    try:
+        yield
+    finally:
+        await session.close()
+
+
+def get_async_session():
+    """The pooled aiohttp session for the running event loop, created on first use"""
+    import aiohttp
+
+    loop = asyncio.get_running_loop()
+    with _async_lock:
+        # Sessions of loops that have since closed were already closed by their guard
+        for old_loop in [old_loop for old_loop in _async_sessions if old_loop.is_closed()]:
+            del _async_sessions[old_loop]
+            _async_guards.pop(old_loop, None)
+
+        session = _async_sessions.get(loop)
+        if session is None or session.closed:
+            connector = aiohttp.TCPConnector(limit_per_host=PROVIDER_POOL_SIZE, ttl_dns_cache=300)
+            session = _async_sessions[loop] = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(sock_connect=PROVIDER_CONNECT_TIMEOUT, sock_read=PROVIDER_READ_TIMEOUT)
+            )
+            guard = _async_guards[loop] = _close_with_loop(session)
+            asyncio.ensure_future(guard.__anext__())
+    return session
+
+
+async def request_json_async(method: str, url: str, timeout: Optional[float] = None,
+                             breaker: Optional[CircuitBreaker] = None,
+                             limiter: Optional[TokenBucket] = None, **kwargs) -> Tuple[int, Any]:
+    """Send a request on the pooled aiohttp session and return (status, decoded JSON or None)"""
+    import aiohttp
+
+    host = urlsplit(url).netloc
+    request_kwargs = {k: v for k, v in kwargs.items() if v is not None}
+    if timeout is not None:
+        request_kwargs["timeout"] = aiohttp.ClientTimeout(total=timeout)
+    reservation = breaker.before_call() if breaker is not None else None
+    await _acquire_async(limiter, breaker, reservation)
+    try:
+        async with get_async_session().request(method, url, **request_kwargs) as response:
+            data = await response.json(content_type=None) if response.status == 200 else None
+            status = response.status
+            retry_after = response.headers.get("Retry-After")
+    except (aiohttp.ClientError, asyncio.TimeoutError, ValueError):
+        _count(host, error=True)
+        if breaker is not None:
+            breaker.record_failure(reservation)
+        raise
+    except BaseException:
+        if breaker is not None:
+            breaker.release(reservation)
+        raise
+    _count(host, error=False)
+    if limiter is not None and status == 429:
+        raise _throttled(limiter, breaker, reservation, retry_after)
+    if breaker is not None:
+        if _is_server_error(status):
+            breaker.record_failure(reservation)
+        else:
+            breaker.record_success(reservation)
+    return status, data
+
+
+async def close_async_session() -> None:
+    """Close the running loop's aiohttp session (call from the app shutdown hook)"""
+    loop = asyncio.get_running_loop()
+    with _async_lock:
+        session = _async_sessions.pop(loop, None)
+        guard = _async_guards.pop(loop, None)
+    if guard is not None:
+        await guard.aclose()
+    if session is not None and not session.closed:
+        await session.close()
+
+
+def get_pool_stats() -> Dict[str, Any]:
+    """Per-host connection pool usage"""
+    pools: List[Dict[str, Any]] = []
+    if _adapter is not None:
+        container = _adapter.poolmanager.pools
+        for key in list(container.keys()):
+            pool = container.get(key)
+            if pool is None:
+                continue
+            # The queue is pre-filled with None placeholders; only real sockets are idle connections
+            idle = sum(1 for conn in list(pool.pool.queue) if conn is not None) if pool.pool is not None else 0
+            pools.append({
+                "host": pool.host,
+                "port": pool.port,
+                "scheme": pool.scheme,
+                "connections_opened": pool.num_connections,
+                "requests": pool.num_requests,
+                "idle_connections": idle,
+                "max_connections": PROVIDER_POOL_SIZE
+            })
+
+    with _counters_lock:
+        hosts = {host: dict(counters) for host, counters in _host_counters.items()}
+
+    return {
+        "pool_size": PROVIDER_POOL_SIZE,
+        "timeouts": {"connect": PROVIDER_CONNECT_TIMEOUT, "read": PROVIDER_READ_TIMEOUT, "booking": PROVIDER_BOOKING_TIMEOUT},
+        "pools": pools,
+        "async_session_open": any(not session.closed for session in list(_async_sessions.values())),
+        "hosts": hosts
+    }
@@ -4,42 +4,30 @@ Supports autonomous booking with user's saved payment method
 """
 
 import requests
+from app.tools import http_client
+from app.tools.travel_service_mock import MOCK_TRAVEL_CATALOG
+from app.tools.circuit_breaker import get_breaker
+from app.tools.rate_limiter import get_limiter
 import json
 from typing import List, Dict, Any, Optional
 from datetime import datetime
 from app.config import (
     OLA_API_KEY, UBER_API_KEY, 
     USER_LATITUDE, USER_LONGITUDE,
-    USE_MOCK_SERVICES
+    USE_MOCK_SERVICES,
+    OLA_API_BASE, UBER_API_BASE
 )
-from app.models import TravelOption
+from app.models import TravelQuote, make_travel_quote
 
-MOCK_OPTIONS = [
-    TravelOption(
-        service="Ola",
-        mode="Ride",
-        cost=95,
-        eta_minutes=8,
-        eta_variance=2,
-        rating=4.6
-    ),
-    TravelOption(
-        service="Uber",
-        mode="UberGo",
-        cost=120,
-        eta_minutes=10,
-        eta_variance=3,
-        rating=4.7
-    ),
-    TravelOption(
-        service="Ola",
-        mode="Auto",
-        cost=60,
-        eta_minutes=12,
-        eta_variance=4,
-        rating=4.4
-    ),
-]
+OLA_BREAKER = get_breaker("ola")
+UBER_BREAKER = get_breaker("uber")
+OLA_LIMITER = get_limiter("ola", OLA_API_KEY)
+UBER_LIMITER = get_limiter("uber", UBER_API_KEY)
+OLA_BOOKING_LIMITER = get_limiter("ola-booking", OLA_API_KEY)
+UBER_BOOKING_LIMITER = get_limiter("uber-booking", UBER_API_KEY)
+
+# Mock data when real API is not available (the shared catalogue)
+MOCK_OPTIONS = MOCK_TRAVEL_CATALOG
 
 # ===============================
 # OLA RIDE INTEGRATION
@@ -50,7 +38,7 @@ def get_ola_ride_estimates(
     pickup_lon: float,
     drop_lat: float, 
     drop_lon: float
-) -> List[TravelOption]:
+) -> List[TravelQuote]:
     """
     Get real ride estimates from Ola
     
@@ -64,7 +52,7 @@ def get_ola_ride_estimates(
     
     if not OLA_API_KEY or USE_MOCK_SERVICES:
         print("Using mock travel data. To use real Ola API, add OLA_API_KEY to .env")
-        return MOCK_OPTIONS
+        return list(MOCK_OPTIONS)
     
     try:
         headers = {
@@ -80,11 +68,13 @@ def get_ola_ride_estimates(
         }
         
         # Get estimates from Ola
-        response = requests.post(
-            "https://api.olarides.com/v1/rides/estimates",
+        response = http_client.post(
+            f"{OLA_API_BASE}/v1/rides/estimates",
             headers=headers,
             json=payload,
-            timeout=5
+            timeout=http_client.DEFAULT_TIMEOUT,
+            breaker=OLA_BREAKER,
+            limiter=OLA_LIMITER
         )
         
         if response.status_code == 200:
@@ -93,7 +83,7 @@ def get_ola_ride_estimates(
             
             for ride in rides:
                 try:
-                    option = TravelOption(
+                    option = make_travel_quote(
                         service="Ola",
                         mode=ride.get("category", "Ride"),
                         cost=float(ride.get("amount", 0)),
@@ -117,7 +107,7 @@ def get_ola_ride_estimates(
     except Exception as e:
         print(f"Ola integration error: {e}")
     
-    return MOCK_OPTIONS
+    return list(MOCK_OPTIONS)
 
 def book_ola_ride(
     pickup_lat: float,
@@ -166,11 +156,13 @@ def book_ola_ride(
         if user_phone:
             payload["customer_phone"] = user_phone
         
-        response = requests.post(
-            "https://api.olarides.com/v1/rides/request",
+        response = http_client.post(
+            f"{OLA_API_BASE}/v1/rides/request",
             headers=headers,
             json=payload,
-            timeout=10
+            timeout=http_client.BOOKING_TIMEOUT,
+            breaker=OLA_BREAKER,
+            limiter=OLA_BOOKING_LIMITER
         )
         
         if response.status_code == 200:
@@ -210,7 +202,7 @@ def get_uber_ride_estimates(
     pickup_lon: float,
     drop_lat: float,
     drop_lon: float
-) -> List[TravelOption]:
+) -> List[TravelQuote]:
     """
     Get real ride estimates from Uber
     
@@ -222,7 +214,7 @@ def get_uber_ride_estimates(
     """
     
     if not UBER_API_KEY or USE_MOCK_SERVICES:
-        return MOCK_OPTIONS
+        return list(MOCK_OPTIONS)
     
     try:
         headers = {
@@ -237,11 +229,13 @@ def get_uber_ride_estimates(
             "end_longitude": drop_lon
         }
         
-        response = requests.get(
-            "https://api.uber.com/v1.2/estimates/price",
+        response = http_client.get(
+            f"{UBER_API_BASE}/v1.2/estimates/price",
             headers=headers,
             params=params,
-            timeout=5
+            timeout=http_client.DEFAULT_TIMEOUT,
+            breaker=UBER_BREAKER,
+            limiter=UBER_LIMITER
         )
         
         if response.status_code == 200:
@@ -265,7 +259,7 @@ def get_uber_ride_estimates(
                     duration_minutes = int(price.get("duration", 0) / 60)
                     
                     if cost > 0:  # Only add if has valid cost
-                        option = TravelOption(
+                        option = make_travel_quote(
                             service="Uber",
                             mode=price.get("display_name", "UberGo"),
                             cost=cost,
@@ -286,7 +280,7 @@ def get_uber_ride_estimates(
     except Exception as e:
         print(f"Uber integration error: {e}")
     
-    return MOCK_OPTIONS
+    return list(MOCK_OPTIONS)
 
 def book_uber_ride(
     pickup_lat: float,
@@ -333,11 +327,13 @@ def book_uber_ride(
         if user_id:
             payload["user_id"] = user_id
         
-        response = requests.post(
-            "https://api.uber.com/v1.2/requests",
+        response = http_client.post(
+            f"{UBER_API_BASE}/v1.2/requests",
             headers=headers,
             json=payload,
-            timeout=10
+            timeout=http_client.BOOKING_TIMEOUT,
+            breaker=UBER_BREAKER,
+            limiter=UBER_BOOKING_LIMITER
         )
         
         if response.status_code in [200, 202]:
@@ -368,7 +364,7 @@ def get_all_travel_options(
     start_lon: float = None,
     end_lat: float = None,
     end_lon: float = None
-) -> List[TravelOption]:
+) -> List[TravelQuote]:
     """Get all available travel options from Ola and Uber"""
     
     start_lat = start_lat or USER_LATITUDE
@@ -394,7 +390,7 @@ def get_all_travel_options(
     
     # If nothing found, use mock
     if not all_options:
-        all_options = MOCK_OPTIONS
+        all_options = list(MOCK_OPTIONS)
     
     # Sort by ETA and limit to 3
     all_options.sort(key=lambda x: x.eta_minutes)
@@ -405,7 +401,7 @@ def get_travel_option(
     start_lon: float = None,
     end_lat: float = None,
     end_lon: float = None
-) -> TravelOption:
+) -> TravelQuote:
     """Get best travel option"""
     options = get_all_travel_options(start_lat, start_lon, end_lat, end_lon)
     return options[0] if options else MOCK_OPTIONS[0]
@@ -0,0 +1,142 @@
+"""
+Provider registry
+Each food or travel provider registers itself here with what it can do, what
+a call costs and how fast it usually answers. The aggregator (app.tools.fanout)
+queries whatever is enabled, so adding a provider means adding a module that
+calls register_provider() and listing it in PROVIDER_MODULES.
+
+Modes (PROVIDER_MODES, e.g. "zomato=real,ola=mock,uber=off"):
+    real  - call the provider's API
+    mock  - serve the provider's entries from the mock catalogue
+    off   - leave the provider out
+    auto  - mock when USE_MOCK_SERVICES is set or the provider has no API key, else real
+"""
+
+import asyncio
+import importlib
+import threading
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence
+
+from app.config import PROVIDER_MODES, PROVIDER_MODULES, USE_MOCK_SERVICES
+
+FOOD = "food"
+TRAVEL = "travel"
+MODES = ("auto", "real", "mock", "off")
+LATENCY_CLASSES = ("fast", "medium", "slow")
+
+
+class Provider:
+    def __init__(self, name: str, kind: str, service: str,
+                 mock_options: Callable[[], List[Any]],
+                 fetch_async: Optional[Callable[..., Awaitable[List[Any]]]] = None,
+                 fetch: Optional[Callable[..., List[Any]]] = None,
+                 api_key: str = "", capabilities: Sequence[str] = ("quotes",),
+                 cost_per_call: float = 0.0, latency_class: str = "medium",
+                 mock_only: bool = False):
+        if kind not in (FOOD, TRAVEL):
+            raise ValueError(f"Unknown provider kind: {kind}")
+        if latency_class not in LATENCY_CLASSES:
+            raise ValueError(f"Unknown latency class: {latency_class}")
+        self.name = name
+        self.kind = kind
+        self.service = service
+        self.mock_options = mock_options
+        # fetch_async(budget, start_lat, start_lon, end_lat, end_lon) -> quotes, raising on failure
+        self.fetch_async = fetch_async
+        # Blocking variant for sync callers, same arguments; optional
+        self.fetch = fetch
+        self.api_key = api_key
+        self.capabilities = frozenset(capabilities)
+        self.cost_per_call = cost_per_call
+        self.latency_class = latency_class
+        # Demo providers without a public API: shown only while everything is mocked
+        self.mock_only = mock_only
+
+    @property
+    def mode(self) -> str:
+        """The resolved mode: real, mock or off"""
+        configured = PROVIDER_MODES.get(self.name, "auto")
+        if configured == "real" and self.fetch_async is None:
+            return "mock"
+        if configured != "auto":
+            return configured
+        if self.mock_only:
+            return "mock" if USE_MOCK_SERVICES else "off"
+        if USE_MOCK_SERVICES or not self.api_key or self.fetch_async is None:
+            return "mock"
+        return "real"
+
+    def fetch_options(self, budget: int, *route: float) -> List[Any]:
+        """Blocking fetch for sync callers (raises on failure)"""
+        if self.fetch is not None:
+            return self.fetch(budget, *route)
+        return asyncio.run(self.fetch_async(budget, *route))
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "kind": self.kind,
+            "service": self.service,
+            "mode": self.mode,
+            "capabilities": sorted(self.capabilities),
+            "cost_per_call": self.cost_per_call,
+            "latency_class": self.latency_class
+        }
+
+
+_providers: Dict[str, Provider] = {}
+_loaded = False
+_load_lock = threading.Lock()
+
+
+def register_provider(provider: Provider) -> Provider:
+    """Add a provider (re-registering a name replaces it)"""
+    if PROVIDER_MODES.get(provider.name) == "real" and provider.fetch_async is None:
+        print(f"Provider {provider.name} has no real implementation, using mock")
+    _providers[provider.name] = provider
+    return provider
+
+
+def _load_provider_modules() -> None:
+    global _loaded
+    with _load_lock:
+        if _loaded:
+            return
+        for module in PROVIDER_MODULES:
+            importlib.import_module(module)
+        _loaded = True
+
+
+def get_providers(kind: Optional[str] = None, capability: Optional[str] = None,
+                  include_off: bool = False) -> List[Provider]:
+    """Registered providers in registration order, optionally filtered"""
+    _load_provider_modules()
+    return [
+        p for p in _providers.values()
+        if (kind is None or p.kind == kind)
+        and (capability is None or capability in p.capabilities)
+        and (include_off or p.mode != "off")
+    ]
+
+
+def describe_providers() -> List[Dict[str, Any]]:
+    return [p.describe() for p in get_providers(include_off=True)]
+
+
+def collect_options(kind: str, budget: int, *route: float) -> List[List[Any]]:
+    """Each enabled quote provider's options, fetched one after another.
+
+    The blocking counterpart of app.tools.fanout.fetch_all_options: same
+    providers, same modes, and failed or empty providers give their mock
+    catalogue entries.
+    """
+    results = []
+    for provider in get_providers(kind, capability="quotes"):
+        options = None
+        if provider.mode == "real":
+            try:
+                options = provider.fetch_options(budget, *route)
+            except Exception as e:
+                print(f"Error fetching {provider.name} data: {e}")
+        results.append(options or provider.mock_options())
+    return results
@@ -0,0 +1,217 @@
+"""
+Provider quote cache
+Keeps recent provider responses keyed by provider, rounded coordinates and
+budget. Fresh entries are served directly; entries past their TTL but within
+the stale window are served while a single background refresh runs.
+Only successful fetches are stored - fetch functions raise on failure.
+Concurrent misses for the same key share one upstream call (single flight).
+Expired entries are kept a while longer so that a fetch refused by the rate
+limiter can still be answered with the last good quote.
+"""
+
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+from app.tools.single_flight import SingleFlight
+from app.tools.rate_limiter import RateLimitedError
+from app.config import (
+    QUOTE_CACHE_TTLS, QUOTE_CACHE_DEFAULT_TTL, QUOTE_CACHE_STALE_SECONDS,
+    QUOTE_CACHE_MAX_ENTRIES, QUOTE_CACHE_COORD_PRECISION, QUOTE_CACHE_THROTTLED_MAX_AGE
+)
+
+
+def quote_key(provider: str, start_lat: float = None, start_lon: float = None,
+              end_lat: float = None, end_lon: float = None, budget: Optional[int] = None) -> Tuple:
+    """Cache key with coordinates rounded so nearby requests share an entry"""
+    coords = tuple(
+        round(c, QUOTE_CACHE_COORD_PRECISION) if c is not None else None
+        for c in (start_lat, start_lon, end_lat, end_lon)
+    )
+    return (provider,) + coords + (budget,)
+
+
+class QuoteCache:
+    def __init__(self, ttls: Dict[str, float] = None, default_ttl: float = QUOTE_CACHE_DEFAULT_TTL,
+                 stale_seconds: float = QUOTE_CACHE_STALE_SECONDS, max_entries: int = QUOTE_CACHE_MAX_ENTRIES,
+                 throttled_max_age: float = QUOTE_CACHE_THROTTLED_MAX_AGE):
+        self.ttls = dict(QUOTE_CACHE_TTLS if ttls is None else ttls)
+        self.default_ttl = default_ttl
+        self.stale_seconds = stale_seconds
+        self.throttled_max_age = throttled_max_age
+        self.max_entries = max_entries
+
+        self._entries: "OrderedDict[Hashable, Tuple[Any, float]]" = OrderedDict()
+        self._refreshing = set()
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._tasks = set()
+        self.flight = SingleFlight()
+
+        self._counters = {"hits": 0, "stale_hits": 0, "misses": 0, "refreshes": 0, "refresh_errors": 0, "evictions": 0,
+                          "throttled_served": 0}
+
+    def ttl_for(self, provider: str) -> float:
+        return self.ttls.get(provider, self.default_ttl)
+
+    def _lookup(self, key: Tuple) -> Tuple[str, Any]:
+        """Classify a key as fresh, stale or miss; claims the refresh for the first stale reader.
+
+        A miss carries the expired value, if it is young enough to stand in for a throttled fetch.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._counters["misses"] += 1
+                return "miss", None
+
+            value, fetched_at = entry
+            age = time.monotonic() - fetched_at
+            ttl = self.ttl_for(key[0])
+            if age < ttl:
+                self._entries.move_to_end(key)
+                self._counters["hits"] += 1
+                return "fresh", value
+            if age < ttl + self.stale_seconds:
+                self._entries.move_to_end(key)
+                self._counters["stale_hits"] += 1
+                if key in self._refreshing:
+                    return "stale", value
+                self._refreshing.add(key)
+                return "refresh", value
+
+            self._counters["misses"] += 1
+            if age < max(self.throttled_max_age, ttl + self.stale_seconds):
+                return "miss", value
+            del self._entries[key]
+            return "miss", None
+
+    def _store(self, key: Tuple, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = (value, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._counters["evictions"] += 1
+
+    def _refresh_done(self, key: Tuple, error: Optional[BaseException]) -> None:
+        with self._lock:
+            self._refreshing.discard(key)
+            self._counters["refreshes"] += 1
+            if error is not None:
+                self._counters["refresh_errors"] += 1
+        if error is not None:
+            print(f"Quote refresh failed for {key[0]}: {error}")
+
+    def get(self, key: Tuple, fetch: Callable[[], Any]) -> Any:
+        """Return a cached quote or call fetch(); fetch errors propagate and are not cached"""
+        state, value = self._lookup(key)
+        if state in ("fresh", "stale"):
+            return value
+        if state == "refresh":
+            self._submit_refresh(key, fetch)
+            return value
+
+        def load():
+            value = fetch()
+            self._store(key, value)
+            return value
+
+        try:
+            return self.flight.do(key, load)
+        except RateLimitedError:
+            if value is None:
+                raise
+            self._served_throttled(key)
+            return value
+
+    async def get_async(self, key: Tuple, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        """Async variant of get(); the stale refresh runs as a task on the current loop"""
+        state, value = self._lookup(key)
+        if state in ("fresh", "stale"):
+            return value
+        if state == "refresh":
+            task = asyncio.ensure_future(self._refresh_async(key, fetch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+            return value
+
+        async def load():
+            value = await fetch()
+            self._store(key, value)
+            return value
+
+        try:
+            return await self.flight.do_async(key, load)
+        except RateLimitedError:
+            if value is None:
+                raise
+            self._served_throttled(key)
+            return value
+
+    def _served_throttled(self, key: Tuple) -> None:
+        with self._lock:
+            self._counters["throttled_served"] += 1
+        print(f"{key[0]} is rate limited, serving its last cached quote")
+
+    def _submit_refresh(self, key: Tuple, fetch: Callable[[], Any]) -> None:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="quote-refresh")
+            executor = self._executor
+        executor.submit(self._refresh_sync, key, fetch)
+
+    def _refresh_sync(self, key: Tuple, fetch: Callable[[], Any]) -> None:
+        try:
+            self._store(key, fetch())
+        except Exception as e:
+            self._refresh_done(key, e)
+            return
+        self._refresh_done(key, None)
+
+    async def _refresh_async(self, key: Tuple, fetch: Callable[[], Awaitable[Any]]) -> None:
+        try:
+            self._store(key, await fetch())
+        except Exception as e:
+            self._refresh_done(key, e)
+            return
+        self._refresh_done(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Hit rate plus per-provider entry count and age"""
+        now = time.monotonic()
+        with self._lock:
+            counters = dict(self._counters)
+            ages: Dict[str, list] = {}
+            for key, (_, fetched_at) in self._entries.items():
+                ages.setdefault(key[0], []).append(now - fetched_at)
+            refreshing = len(self._refreshing)
+
+        lookups = counters["hits"] + counters["stale_hits"] + counters["misses"]
+        providers = {
+            provider: {
+                "entries": len(values),
+                "ttl_seconds": self.ttl_for(provider),
+                "mean_age_seconds": round(sum(values) / len(values), 2),
+                "max_age_seconds": round(max(values), 2)
+            }
+            for provider, values in ages.items()
+        }
+        return {
+            **counters,
+            "entries": sum(p["entries"] for p in providers.values()),
+            "refreshing": refreshing,
+            "hit_rate": round((counters["hits"] + counters["stale_hits"]) / lookups, 3) if lookups else 0.0,
+            "stale_seconds": self.stale_seconds,
+            "providers": providers
+        }
+
+
+quote_cache = QuoteCache()
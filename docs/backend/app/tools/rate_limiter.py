@@ -0,0 +1,189 @@
+"""
+Per-key provider rate limiting
+A token bucket per provider API key, kept in a small state file under a
+file lock so every worker process draws from the same quota. Callers wait a
+short while for a token instead of being rejected outright; if none arrives
+in time they get RateLimitedError, which the quote cache answers from its
+last good entry.
+"""
+
+import asyncio
+import hashlib
+import json
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: fall back to in-process locking only
+    fcntl = None
+
+from app.config import (
+    PROVIDER_RATE_LIMITS, PROVIDER_RATE_BURST, RATE_LIMIT_MAX_WAIT, RATE_LIMIT_DIR
+)
+
+DEFAULT_STATE_DIR = Path(__file__).parent.parent.parent / "agent_ratelimits"
+
+
+class RateLimitedError(Exception):
+    """No request slot for a provider key, locally or because the provider answered 429"""
+
+    def __init__(self, provider: str, retry_after: float):
+        super().__init__(f"{provider} rate limited, retry in {retry_after:.2f}s")
+        self.provider = provider
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    def __init__(self, name: str, rate_per_minute: float, burst: int,
+                 state_dir: Optional[Path] = None):
+        self.name = name
+        self.rate = rate_per_minute / 60.0  # tokens per second
+        self.burst = max(1, burst)
+        state_dir = Path(state_dir or RATE_LIMIT_DIR or DEFAULT_STATE_DIR)
+        state_dir.mkdir(parents=True, exist_ok=True)
+        self.state_file = state_dir / f"{name}.bucket"
+        self._lock = threading.Lock()
+        self._counters = {"granted": 0, "waited": 0, "throttled": 0, "penalties": 0}
+
+    def _refill(self, raw: str, now: float) -> float:
+        """Tokens in the bucket at now, given the stored state"""
+        try:
+            state = json.loads(raw) if raw else {}
+        except json.JSONDecodeError:
+            state = {}
+        tokens = state.get("tokens", float(self.burst))
+        elapsed = max(0.0, now - state.get("updated", now))
+        return min(float(self.burst), tokens + elapsed * self.rate)
+
+    def _update(self, change) -> Any:
+        """Run change(tokens, now) -> (tokens, result) on the shared state under the file lock"""
+        with self._lock:
+            with open(self.state_file, "a+") as f:
+                if fcntl is not None:
+                    fcntl.flock(f, fcntl.LOCK_EX)
+                try:
+                    f.seek(0)
+                    now = time.time()  # wall clock, so every process agrees
+                    tokens, result = change(self._refill(f.read(), now), now)
+
+                    f.seek(0)
+                    f.truncate()
+                    f.write(json.dumps({"tokens": tokens, "updated": now}))
+                    f.flush()
+                finally:
+                    if fcntl is not None:
+                        fcntl.flock(f, fcntl.LOCK_UN)
+        return result
+
+    def _peek(self) -> float:
+        """Current token count, read under a shared lock without writing the state back"""
+        try:
+            with open(self.state_file) as f:
+                if fcntl is not None:
+                    fcntl.flock(f, fcntl.LOCK_SH)
+                try:
+                    raw = f.read()
+                finally:
+                    if fcntl is not None:
+                        fcntl.flock(f, fcntl.LOCK_UN)
+        except FileNotFoundError:
+            raw = ""
+        return self._refill(raw, time.time())
+
+    def _try_take(self) -> float:
+        """Take a token if one is available; otherwise return seconds until the next one"""
+        def take(tokens, now):
+            if tokens >= 1:
+                return tokens - 1, 0.0
+            return tokens, (1 - tokens) / self.rate if self.rate > 0 else float("inf")
+        return self._update(take)
+
+    def acquire(self, max_wait: float = RATE_LIMIT_MAX_WAIT) -> None:
+        """Wait up to max_wait seconds for a token, raising RateLimitedError if none comes"""
+        give_up = time.monotonic() + max_wait
+        waited = False
+        while True:
+            wait = self._try_take()
+            if wait == 0:
+                self._count("waited" if waited else "granted")
+                return
+            remaining = give_up - time.monotonic()
+            if wait > remaining:
+                self._count("throttled")
+                raise RateLimitedError(self.name, wait)
+            waited = True
+            time.sleep(wait)
+
+    async def acquire_async(self, max_wait: float = RATE_LIMIT_MAX_WAIT) -> None:
+        """acquire() for coroutines: waits with asyncio.sleep"""
+        give_up = time.monotonic() + max_wait
+        waited = False
+        while True:
+            # Taking a token blocks on the file lock, keep that off the event loop
+            wait = await asyncio.to_thread(self._try_take)
+            if wait == 0:
+                self._count("waited" if waited else "granted")
+                return
+            remaining = give_up - time.monotonic()
+            if wait > remaining:
+                self._count("throttled")
+                raise RateLimitedError(self.name, wait)
+            waited = True
+            await asyncio.sleep(wait)
+
+    def penalize(self, retry_after: float) -> None:
+        """The provider said 429: hold every process off for retry_after seconds"""
+        # Leave the bucket so the next token is exactly retry_after away
+        self._update(lambda tokens, now: (min(tokens, 1.0 - retry_after * self.rate), None))
+        self._count("penalties")
+
+    def _count(self, counter: str) -> None:
+        with self._lock:
+            self._counters[counter] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        tokens = self._peek()
+        with self._lock:
+            counters = dict(self._counters)
+        return {
+            "rate_per_minute": round(self.rate * 60, 2),
+            "burst": self.burst,
+            "tokens": round(tokens, 2),
+            **counters
+        }
+
+
+_limiters: Dict[str, TokenBucket] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_limiter(provider: str, api_key: str = "") -> TokenBucket:
+    """The shared bucket for a provider key (the key itself is only stored hashed)"""
+    key_id = hashlib.blake2b(api_key.encode("utf-8"), digest_size=4).hexdigest() if api_key else "nokey"
+    name = f"{provider}-{key_id}"
+    with _limiters_lock:
+        limiter = _limiters.get(name)
+        if limiter is None:
+            limiter = _limiters[name] = TokenBucket(
+                name,
+                PROVIDER_RATE_LIMITS.get(provider, PROVIDER_RATE_LIMITS["default"]),
+                PROVIDER_RATE_BURST
+            )
+        return limiter
+
+
+def get_limiter_stats() -> Dict[str, Dict[str, Any]]:
+    with _limiters_lock:
+        limiters = list(_limiters.values())
+    return {limiter.name: limiter.get_stats() for limiter in limiters}
+
+
+def parse_retry_after(value: Optional[str], default: float = 1.0) -> float:
+    """Seconds from a Retry-After header (HTTP dates are treated as the default)"""
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        return default
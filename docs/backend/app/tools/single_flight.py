@@ -0,0 +1,95 @@
+"""
+Single-flight request coalescing
+Concurrent callers asking for the same key share one upstream call: the first
+caller runs it, everyone else waits for and receives the same result or error.
+"""
+
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+
+class _Call:
+    __slots__ = ("done", "result", "error", "waiters")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    def __init__(self):
+        self._calls: Dict[Hashable, _Call] = {}
+        self._tasks: Dict[Hashable, asyncio.Task] = {}
+        self._lock = threading.Lock()
+        self._counters = {"leaders": 0, "coalesced": 0}
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """Run fn once for all threads currently asking for key"""
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                self._counters["coalesced"] += 1
+                leader = False
+            else:
+                call = _Call()
+                self._calls[key] = call
+                self._counters["leaders"] += 1
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+        return call.result
+
+    async def do_async(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Run fn once for all coroutines on this loop currently asking for key.
+
+        The upstream call runs as its own task, so a caller that is cancelled
+        (e.g. by a fan-out deadline) does not cancel it for the others.
+        """
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            task = self._tasks.get(key)
+            if task is not None and not task.done() and task.get_loop() is loop:
+                self._counters["coalesced"] += 1
+            else:
+                task = loop.create_task(fn())
+                self._tasks[key] = task
+                self._counters["leaders"] += 1
+                task.add_done_callback(lambda t, key=key: self._finish_task(key, t))
+        return await asyncio.shield(task)
+
+    def _finish_task(self, key: Hashable, task: asyncio.Task) -> None:
+        with self._lock:
+            if self._tasks.get(key) is task:
+                del self._tasks[key]
+        # Mark the error as retrieved even if every caller has gone away
+        if not task.cancelled():
+            task.exception()
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            counters = dict(self._counters)
+            in_flight = len(self._calls) + len(self._tasks)
+        requests = counters["leaders"] + counters["coalesced"]
+        return {
+            **counters,
+            "in_flight": in_flight,
+            "coalesce_rate": round(counters["coalesced"] / requests, 3) if requests else 0.0
+        }
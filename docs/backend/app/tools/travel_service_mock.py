@@ -1,157 +1,255 @@
-import requests
+from app.tools import http_client
+from app.tools.quote_cache import quote_cache, quote_key
+from app.tools.circuit_breaker import CircuitBreaker, get_breaker
+from app.tools.rate_limiter import TokenBucket, get_limiter
+from app.tools.providers import Provider, TRAVEL, collect_options, register_provider
 import json
 from typing import List, Dict, Any
 from app.config import USE_MOCK_SERVICES, UBER_API_KEY, OLA_API_KEY
 from app.config import USER_LATITUDE, USER_LONGITUDE
-from app.models import TravelOption
+from app.config import UBER_API_BASE, OLA_API_BASE
+from app.models import TravelQuote, make_travel_quote
 
-def get_uber_estimates(start_lat: float, start_lon: float, 
-                       end_lat: float, end_lon: float) -> List[TravelOption]:
-    """Fetch Uber ride estimates"""
-    if not UBER_API_KEY or USE_MOCK_SERVICES:
-        return get_mock_travel_options()
-    
-    try:
-        headers = {
+UBER_BREAKER = get_breaker("uber")
+OLA_BREAKER = get_breaker("ola")
+UBER_LIMITER = get_limiter("uber", UBER_API_KEY)
+OLA_LIMITER = get_limiter("ola", OLA_API_KEY)
+
+UBER_ESTIMATES_URL = f"{UBER_API_BASE}/v1.2/estimates/price"
+OLA_ESTIMATES_URL = f"{OLA_API_BASE}/v1/rides/estimates"
+
+
+def build_uber_request(start_lat: float, start_lon: float,
+                       end_lat: float, end_lon: float) -> Dict[str, Any]:
+    """Request arguments for an Uber price estimate"""
+    return {
+        "method": "GET",
+        "url": UBER_ESTIMATES_URL,
+        "headers": {
             "Authorization": f"Bearer {UBER_API_KEY}",
             "Accept-Language": "en_IN"
-        }
-        
-        params = {
+        },
+        "params": {
             "pickup_latitude": start_lat,
             "pickup_longitude": start_lon,
             "dropoff_latitude": end_lat,
             "dropoff_longitude": end_lon
         }
-        
-        response = requests.get(
-            "https://api.uber.com/v1.2/estimates/price",
-            headers=headers,
-            params=params,
-            timeout=5
+    }
+
+
+def parse_uber_response(data: Dict[str, Any]) -> List[TravelQuote]:
+    """Turn an Uber price estimate response into travel options"""
+    options = []
+    for price in data.get("prices", []):
+        option = make_travel_quote(
+            service="Uber",
+            mode=price.get("display_name", "UberGo"),
+            cost=float(price.get("estimate", "0").split("-")[0].replace("$", "").strip() or "0") * 80,
+            eta_minutes=int(price.get("duration", 0) / 60) or 10,
+            eta_variance=2.0,
+            rating=4.7,
         )
-        
-        if response.status_code == 200:
-            prices = response.json().get("prices", [])
-            options = []
-            
-            for price in prices:
-                option = TravelOption(
-                    service="Uber",
-                    mode=price.get("display_name", "UberGo"),
-                    cost=float(price.get("estimate", "0").split("-")[0].replace("$", "").strip() or "0") * 80,
-                    eta_minutes=int(price.get("duration", 0) / 60) or 10,
-                    eta_variance=2.0,
-                    rating=4.7,
-                )
-                if option.cost > 0:
-                    options.append(option)
-            
-            return options if options else get_mock_travel_options()
-        
+        if option.cost > 0:
+            options.append(option)
+    return options
+
+
+def build_ola_request(start_lat: float, start_lon: float,
+                      end_lat: float, end_lon: float) -> Dict[str, Any]:
+    """Request arguments for an Ola ride estimate"""
+    return {
+        "method": "POST",
+        "url": OLA_ESTIMATES_URL,
+        "headers": {
+            "Authorization": f"Bearer {OLA_API_KEY}",
+            "Content-Type": "application/json"
+        },
+        "json": {
+            "pickup_latitude": start_lat,
+            "pickup_longitude": start_lon,
+            "drop_latitude": end_lat,
+            "drop_longitude": end_lon
+        }
+    }
+
+
+def parse_ola_response(data: Dict[str, Any]) -> List[TravelQuote]:
+    """Turn an Ola ride estimate response into travel options"""
+    options = []
+    for ride in data.get("rides", []):
+        option = make_travel_quote(
+            service="Ola",
+            mode=ride.get("category", "Ride"),
+            cost=float(ride.get("amount", 0)),
+            eta_minutes=int(ride.get("eta", 10)),
+            eta_variance=1.5,
+            rating=4.6,
+        )
+        options.append(option)
+    return options
+
+
+def _fetch_sync(req: Dict[str, Any], parse, provider: str, key: tuple,
+                breaker: CircuitBreaker, limiter: TokenBucket) -> List[TravelQuote]:
+    """Call a provider through the quote cache (raises on any failure)"""
+    def fetch():
+        response = http_client.request(
+            req["method"],
+            req["url"],
+            headers=req["headers"],
+            params=req.get("params"),
+            json=req.get("json"),
+            timeout=http_client.DEFAULT_TIMEOUT,
+            breaker=breaker,
+            limiter=limiter
+        )
+        if response.status_code != 200:
+            raise http_client.ProviderError(provider, response.status_code)
+        return parse(response.json())
+
+    return quote_cache.get(key, fetch)
+
+
+async def _fetch_async(req: Dict[str, Any], parse, provider: str, key: tuple,
+                       breaker: CircuitBreaker, limiter: TokenBucket) -> List[TravelQuote]:
+    """Async variant of _fetch_sync"""
+    async def fetch():
+        status, data = await http_client.request_json_async(
+            req["method"], req["url"],
+            headers=req["headers"],
+            params=req.get("params"),
+            json=req.get("json"),
+            breaker=breaker,
+            limiter=limiter
+        )
+        if status != 200:
+            raise http_client.ProviderError(provider, status)
+        return parse(data)
+
+    return await quote_cache.get_async(key, fetch)
+
+
+def _with_fallback(options: List[TravelQuote]) -> List[TravelQuote]:
+    return options if options else get_mock_travel_options()
+
+
+def get_uber_estimates(start_lat: float, start_lon: float, 
+                       end_lat: float, end_lon: float) -> List[TravelQuote]:
+    """Fetch Uber ride estimates"""
+    if not UBER_API_KEY or USE_MOCK_SERVICES:
+        return get_mock_travel_options()
+    
+    try:
+        return _with_fallback(fetch_uber_estimates(start_lat, start_lon, end_lat, end_lon))
     except Exception as e:
         print(f"Error fetching Uber data: {e}")
     
     return get_mock_travel_options()
 
 
+def fetch_uber_estimates(start_lat: float, start_lon: float,
+                         end_lat: float, end_lon: float) -> List[TravelQuote]:
+    """Uber ride estimates through the quote cache (raises on any failure)"""
+    req = build_uber_request(start_lat, start_lon, end_lat, end_lon)
+    key = quote_key("uber", start_lat, start_lon, end_lat, end_lon)
+    return _fetch_sync(req, parse_uber_response, "Uber", key, UBER_BREAKER, UBER_LIMITER)
+
+
+async def fetch_uber_estimates_async(start_lat: float, start_lon: float,
+                                     end_lat: float, end_lon: float) -> List[TravelQuote]:
+    """Uber ride estimates through the quote cache (raises on any failure)"""
+    req = build_uber_request(start_lat, start_lon, end_lat, end_lon)
+    key = quote_key("uber", start_lat, start_lon, end_lat, end_lon)
+    return await _fetch_async(req, parse_uber_response, "Uber", key, UBER_BREAKER, UBER_LIMITER)
+
+
 def get_ola_quotes(start_lat: float, start_lon: float,
-                   end_lat: float, end_lon: float) -> List[TravelOption]:
+                   end_lat: float, end_lon: float) -> List[TravelQuote]:
     """Fetch Ola ride quotes"""
     if not OLA_API_KEY or USE_MOCK_SERVICES:
         return get_mock_travel_options()
     
     try:
-        headers = {
-            "Authorization": f"Bearer {OLA_API_KEY}",
-            "Content-Type": "application/json"
-        }
-        
-        payload = {
-            "pickup_latitude": start_lat,
-            "pickup_longitude": start_lon,
-            "drop_latitude": end_lat,
-            "drop_longitude": end_lon
-        }
-        
-        response = requests.post(
-            "https://api.olarides.com/v1/rides/estimates",
-            headers=headers,
-            json=payload,
-            timeout=5
-        )
-        
-        if response.status_code == 200:
-            data = response.json()
-            options = []
-            
-            for ride in data.get("rides", []):
-                option = TravelOption(
-                    service="Ola",
-                    mode=ride.get("category", "Ride"),
-                    cost=float(ride.get("amount", 0)),
-                    eta_minutes=int(ride.get("eta", 10)),
-                    eta_variance=1.5,
-                    rating=4.6,
-                )
-                options.append(option)
-            
-            return options if options else get_mock_travel_options()
-        
+        return _with_fallback(fetch_ola_quotes(start_lat, start_lon, end_lat, end_lon))
     except Exception as e:
         print(f"Error fetching Ola data: {e}")
     
     return get_mock_travel_options()
 
 
-def get_mock_travel_options() -> List[TravelOption]:
+def fetch_ola_quotes(start_lat: float, start_lon: float,
+                     end_lat: float, end_lon: float) -> List[TravelQuote]:
+    """Ola ride quotes through the quote cache (raises on any failure)"""
+    req = build_ola_request(start_lat, start_lon, end_lat, end_lon)
+    key = quote_key("ola", start_lat, start_lon, end_lat, end_lon)
+    return _fetch_sync(req, parse_ola_response, "Ola", key, OLA_BREAKER, OLA_LIMITER)
+
+
+async def fetch_ola_quotes_async(start_lat: float, start_lon: float,
+                                 end_lat: float, end_lon: float) -> List[TravelQuote]:
+    """Ola ride quotes through the quote cache (raises on any failure)"""
+    req = build_ola_request(start_lat, start_lon, end_lat, end_lon)
+    key = quote_key("ola", start_lat, start_lon, end_lat, end_lon)
+    return await _fetch_async(req, parse_ola_response, "Ola", key, OLA_BREAKER, OLA_LIMITER)
+
+
+MOCK_TRAVEL_CATALOG = (
+    make_travel_quote(
+        service="Ola",
+        mode="Ride",
+        cost=85,
+        eta_minutes=7,
+        eta_variance=2,
+        rating=4.6
+    ),
+    make_travel_quote(
+        service="Ola",
+        mode="Auto",
+        cost=55,
+        eta_minutes=8,
+        eta_variance=3,
+        rating=4.4
+    ),
+    make_travel_quote(
+        service="Uber",
+        mode="UberGo",
+        cost=120,
+        eta_minutes=9,
+        eta_variance=2,
+        rating=4.7
+    ),
+    make_travel_quote(
+        service="Uber",
+        mode="UberX",
+        cost=180,
+        eta_minutes=8,
+        eta_variance=1,
+        rating=4.8
+    ),
+    make_travel_quote(
+        service="Ola",
+        mode="Bike",
+        cost=40,
+        eta_minutes=6,
+        eta_variance=1,
+        rating=4.5
+    ),
+)
+
+
+def get_mock_travel_options() -> List[TravelQuote]:
     """Return realistic mock travel options for Chennai"""
-    return [
-        TravelOption(
-            service="Ola",
-            mode="Ride",
-            cost=85,
-            eta_minutes=7,
-            eta_variance=2,
-            rating=4.6
-        ),
-        TravelOption(
-            service="Ola",
-            mode="Auto",
-            cost=55,
-            eta_minutes=8,
-            eta_variance=3,
-            rating=4.4
-        ),
-        TravelOption(
-            service="Uber",
-            mode="UberGo",
-            cost=120,
-            eta_minutes=9,
-            eta_variance=2,
-            rating=4.7
-        ),
-        TravelOption(
-            service="Uber",
-            mode="UberX",
-            cost=180,
-            eta_minutes=8,
-            eta_variance=1,
-            rating=4.8
-        ),
-        TravelOption(
-            service="Ola",
-            mode="Bike",
-            cost=40,
-            eta_minutes=6,
-            eta_variance=1,
-            rating=4.5
-        ),
-    ]
+    return list(MOCK_TRAVEL_CATALOG)
+
+
+def mock_travel_options_for(service: str) -> List[TravelQuote]:
+    """The mock catalogue entries of one service"""
+    return [opt for opt in MOCK_TRAVEL_CATALOG if opt.service == service]
 
 
 def get_travel_option(start_lat: float = None, start_lon: float = None,
-                     end_lat: float = None, end_lon: float = None) -> TravelOption:
+                     end_lat: float = None, end_lon: float = None) -> TravelQuote:
     """Get a single recommended travel option"""
     start_lat = start_lat or USER_LATITUDE
     start_lon = start_lon or USER_LONGITUDE
@@ -166,7 +264,7 @@ def get_travel_option(start_lat: float = None, start_lon: float = None,
     if ola_options:
         return ola_options[0]
     
-    return TravelOption(
+    return make_travel_quote(
         service="Ola",
         mode="Ride",
         cost=85,
@@ -177,18 +275,41 @@ def get_travel_option(start_lat: float = None, start_lon: float = None,
 
 
 def get_all_travel_options(start_lat: float = None, start_lon: float = None,
-                          end_lat: float = None, end_lon: float = None) -> List[TravelOption]:
-    """Get multiple travel options"""
+                          end_lat: float = None, end_lon: float = None) -> List[TravelQuote]:
+    """Get multiple travel options from every enabled provider"""
     start_lat = start_lat or USER_LATITUDE
     start_lon = start_lon or USER_LONGITUDE
     end_lat = end_lat or 12.9914  # IIT Madras
     end_lon = end_lon or 80.2303
     
-    uber_options = get_uber_estimates(start_lat, start_lon, end_lat, end_lon)
-    ola_options = get_ola_quotes(start_lat, start_lon, end_lat, end_lon)
-    
-    all_options = uber_options + ola_options
+    # Travel quotes do not depend on the budget
+    return merge_travel_options(*collect_options(TRAVEL, 0, start_lat, start_lon, end_lat, end_lon))
+
+
+def merge_travel_options(*option_lists: List[TravelQuote]) -> List[TravelQuote]:
+    """Combine provider results, quickest first"""
+    all_options = [opt for options in option_lists for opt in options]
     return sorted(all_options, key=lambda x: x.eta_minutes)
 
 
+register_provider(Provider(
+    "uber", TRAVEL, "Uber",
+    mock_options=lambda: mock_travel_options_for("Uber"),
+    fetch_async=lambda budget, *route: fetch_uber_estimates_async(*route),
+    fetch=lambda budget, *route: fetch_uber_estimates(*route),
+    api_key=UBER_API_KEY,
+    capabilities=("quotes", "booking"),
+    cost_per_call=0.0,
+    latency_class="medium"
+))
 
+register_provider(Provider(
+    "ola", TRAVEL, "Ola",
+    mock_options=lambda: mock_travel_options_for("Ola"),
+    fetch_async=lambda budget, *route: fetch_ola_quotes_async(*route),
+    fetch=lambda budget, *route: fetch_ola_quotes(*route),
+    api_key=OLA_API_KEY,
+    capabilities=("quotes", "booking"),
+    cost_per_call=0.0,
+    latency_class="medium"
+))
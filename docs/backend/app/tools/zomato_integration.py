@@ -4,40 +4,21 @@ Requires: ZOMATO_API_KEY in .env
 """
 
 import requests
+from app.tools import http_client
+from app.tools.food_service_mock import MOCK_FOOD_CATALOG
+from app.tools.circuit_breaker import get_breaker
+from app.tools.rate_limiter import get_limiter
 from typing import List, Optional
 from app.config import ZOMATO_API_KEY, USER_LATITUDE, USER_LONGITUDE, USE_MOCK_SERVICES
-from app.models import FoodOption
+from app.config import ZOMATO_API_BASE
+from app.models import FoodQuote, make_food_quote
 
-# Mock data when real API is not available
-MOCK_RESTAURANTS = [
-    FoodOption(
-        restaurant="Sangeetha Veg",
-        item="Idli + Dosa Combo",
-        price=120,
-        eta_minutes=15,
-        eta_variance=3,
-        rating=4.5,
-        service="Swiggy"
-    ),
-    FoodOption(
-        restaurant="MTR",
-        item="Set Dosa + Sambar",
-        price=150,
-        eta_minutes=18,
-        eta_variance=4,
-        rating=4.7,
-        service="Zomato"
-    ),
-    FoodOption(
-        restaurant="Kaldan Continental",
-        item="Chole Bhature",
-        price=180,
-        eta_minutes=20,
-        eta_variance=5,
-        rating=4.3,
-        service="Swiggy"
-    ),
-]
+ZOMATO_BREAKER = get_breaker("zomato")
+ZOMATO_LIMITER = get_limiter("zomato", ZOMATO_API_KEY)
+ZOMATO_LOOKUP_LIMITER = get_limiter("zomato-lookup", ZOMATO_API_KEY)
+
+# Mock data when real API is not available (the shared catalogue)
+MOCK_RESTAURANTS = MOCK_FOOD_CATALOG
 
 def get_zomato_location_id(city: str = "Chennai") -> Optional[int]:
     """Get location ID from Zomato"""
@@ -46,11 +27,13 @@ def get_zomato_location_id(city: str = "Chennai") -> Optional[int]:
     
     try:
         headers = {"user-key": ZOMATO_API_KEY}
-        response = requests.get(
-            "https://api.zomato.com/api/v2.1/cities",
+        response = http_client.get(
+            f"{ZOMATO_API_BASE}/api/v2.1/cities",
             headers=headers,
             params={"q": city},
-            timeout=5
+            timeout=http_client.DEFAULT_TIMEOUT,
+            breaker=ZOMATO_BREAKER,
+            limiter=ZOMATO_LOOKUP_LIMITER
         )
         
         if response.status_code == 200:
@@ -62,7 +45,7 @@ def get_zomato_location_id(city: str = "Chennai") -> Optional[int]:
     
     return None
 
-def get_zomato_restaurants(cuisine: str = "South Indian", budget: int = 200) -> List[FoodOption]:
+def get_zomato_restaurants(cuisine: str = "South Indian", budget: int = 200) -> List[FoodQuote]:
     """
     Fetch real restaurants from Zomato API
     
@@ -75,14 +58,14 @@ def get_zomato_restaurants(cuisine: str = "South Indian", budget: int = 200) ->
     """
     if not ZOMATO_API_KEY or USE_MOCK_SERVICES:
         print("Using mock food data. To use real Zomato API, add ZOMATO_API_KEY to .env")
-        return MOCK_RESTAURANTS
+        return list(MOCK_RESTAURANTS)
     
     try:
         headers = {"user-key": ZOMATO_API_KEY}
         
         # Search by coordinates (Chennai center)
-        response = requests.get(
-            "https://api.zomato.com/api/v2.1/search",
+        response = http_client.get(
+            f"{ZOMATO_API_BASE}/api/v2.1/search",
             headers=headers,
             params={
                 "lat": USER_LATITUDE,
@@ -93,7 +76,9 @@ def get_zomato_restaurants(cuisine: str = "South Indian", budget: int = 200) ->
                 "cuisines": cuisine,
                 "delivery": 1  # Only delivery available
             },
-            timeout=5
+            timeout=http_client.DEFAULT_TIMEOUT,
+            breaker=ZOMATO_BREAKER,
+            limiter=ZOMATO_LIMITER
         )
         
         if response.status_code == 200:
@@ -111,7 +96,7 @@ def get_zomato_restaurants(cuisine: str = "South Indian", budget: int = 200) ->
                 # Extract delivery time from offers or estimate
                 delivery_time = rest.get("delivery_time", 30)
                 
-                option = FoodOption(
+                option = make_food_quote(
                     restaurant=rest.get("name", "Unknown"),
                     item="Recommended Item",
                     price=float(rest.get("average_cost_for_two", 200) / 2),
@@ -135,9 +120,9 @@ def get_zomato_restaurants(cuisine: str = "South Indian", budget: int = 200) ->
         print(f"Zomato API error: {e}")
     
     # Fallback to mock
-    return MOCK_RESTAURANTS
+    return list(MOCK_RESTAURANTS)
 
-def get_swiggy_restaurants(cuisine: str = "South Indian", budget: int = 200) -> List[FoodOption]:
+def get_swiggy_restaurants(cuisine: str = "South Indian", budget: int = 200) -> List[FoodQuote]:
     """
     Swiggy doesn't have an official public API
     
@@ -151,7 +136,7 @@ def get_swiggy_restaurants(cuisine: str = "South Indian", budget: int = 200) ->
     print("Swiggy API not available. Using Zomato as primary delivery service.")
     return []
 
-def get_all_food_options(cuisine: str = "South Indian", budget: int = 200) -> List[FoodOption]:
+def get_all_food_options(cuisine: str = "South Indian", budget: int = 200) -> List[FoodQuote]:
     """Get combined options from available services"""
     
     # Try Zomato first
@@ -163,13 +148,13 @@ def get_all_food_options(cuisine: str = "South Indian", budget: int = 200) -> Li
     
     # If nothing found, use mock
     if not options:
-        options = MOCK_RESTAURANTS
+        options = list(MOCK_RESTAURANTS)
     
     # Limit to top 3 by rating
     options.sort(key=lambda x: x.rating, reverse=True)
     return options[:3]
 
-def get_food_option(cuisine: str = "South Indian") -> FoodOption:
+def get_food_option(cuisine: str = "South Indian") -> FoodQuote:
     """Get best food option"""
     options = get_all_food_options(cuisine)
     return options[0] if options else MOCK_RESTAURANTS[0]
@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+Provider Stand-in Server
+Serves the Zomato, Ola and Uber endpoints the integrations call, with
+realistic latency, errors and payload sizes, so the backend can be
+load-tested without real API keys.
+
+Run it, then start the backend with PROVIDER_STANDIN_URL pointing at it:
+
+    python scripts/provider_standin.py --port 8900 --p50-ms 120 --p99-ms 1500 --error-rate 0.02
+    PROVIDER_STANDIN_URL=http://127.0.0.1:8900 uvicorn app.main:app
+
+Latency is drawn from a lognormal fitted to the requested p50/p99, per provider
+if --profile is given (e.g. --profile ola=300,4000,0.1 for a slow, flaky Ola).
+"""
+
+import argparse
+import asyncio
+import math
+import random
+import time
+from collections import defaultdict
+
+from aiohttp import web
+
+Z_99 = 2.3263  # standard normal 99th percentile
+
+RESTAURANT_NAMES = [
+    "Sangeetha Veg Restaurant", "MTR (Madras Tiffin Restaurant)", "Aachi Biryani",
+    "Dindigul Thalapakatti", "Kaldan Continental", "Saravana Bhavan",
+    "Murugan Idli Shop", "Anjappar Chettinad", "Ratna Cafe", "Buhari Hotel"
+]
+OLA_CATEGORIES = ["Mini", "Prime", "Auto", "Bike", "Prime SUV"]
+UBER_PRODUCTS = ["UberGo", "Premier", "UberXL", "Moto", "Auto"]
+
+
+class Profile:
+    """Latency and error behaviour for one provider"""
+
+    def __init__(self, p50_ms: float, p99_ms: float, error_rate: float):
+        self.p50_ms = p50_ms
+        self.p99_ms = max(p99_ms, p50_ms)
+        self.error_rate = error_rate
+        self.mu = math.log(max(p50_ms, 0.001))
+        self.sigma = math.log(self.p99_ms / max(p50_ms, 0.001)) / Z_99
+
+    def sample_delay(self, rng: random.Random) -> float:
+        """Seconds to wait before answering"""
+        return math.exp(rng.gauss(self.mu, self.sigma)) / 1000
+
+
+class StandIn:
+    def __init__(self, args):
+        self.args = args
+        self.rng = random.Random(args.seed)
+        default = Profile(args.p50_ms, args.p99_ms, args.error_rate)
+        self.profiles = {name: default for name in ("zomato", "ola", "uber")}
+        for spec in args.profile or []:
+            name, _, values = spec.partition("=")
+            p50, p99, error_rate = (float(v) for v in values.split(","))
+            self.profiles[name.strip().lower()] = Profile(p50, p99, error_rate)
+        self.padding = "x" * args.padding_bytes
+        self.latencies = defaultdict(list)
+        self.statuses = defaultdict(lambda: defaultdict(int))
+
+    async def respond(self, provider: str, route: str, build_body, ok_status: int = 200):
+        """Sleep per the provider profile, then answer with an error or build_body()"""
+        profile = self.profiles[provider]
+        delay = profile.sample_delay(self.rng)
+        roll = self.rng.random()
+        started = time.perf_counter()
+
+        if roll < self.args.hang_rate:
+            await asyncio.sleep(self.args.hang_seconds)
+            status, body = 504, {"error": "upstream timeout"}
+        else:
+            await asyncio.sleep(delay)
+            if roll < self.args.hang_rate + self.args.rate_limit_rate:
+                status, body = 429, {"error": "rate limited"}
+            elif roll < self.args.hang_rate + self.args.rate_limit_rate + profile.error_rate:
+                status, body = self.rng.choice((500, 502, 503)), {"error": "provider error"}
+            else:
+                status, body = ok_status, build_body()
+                if self.padding:
+                    body["_padding"] = self.padding
+
+        self.latencies[route].append((time.perf_counter() - started) * 1000)
+        self.statuses[route][status] += 1
+        headers = {"Retry-After": "1"} if status == 429 else None
+        return web.json_response(body, status=status, headers=headers)
+
+    # ----- Zomato -----
+
+    async def zomato_search(self, request):
+        def body():
+            restaurants = []
+            for i in range(self.args.restaurants):
+                restaurants.append({"restaurant": {
+                    "id": 10000 + i,
+                    "name": RESTAURANT_NAMES[i % len(RESTAURANT_NAMES)],
+                    "average_cost_for_two": self.rng.randrange(160, 600, 10),
+                    "delivery_time": self.rng.randint(10, 45),
+                    "user_rating": {"aggregate_rating": str(round(self.rng.uniform(3.5, 4.9), 1))}
+                }})
+            return {"results_found": len(restaurants), "restaurants": restaurants}
+
+        return await self.respond("zomato", "zomato.search", body)
+
+    async def zomato_cities(self, request):
+        city = request.query.get("q", "Chennai")
+        return await self.respond("zomato", "zomato.cities", lambda: {"city_results": [{"id": 7, "name": city}]})
+
+    # ----- Ola -----
+
+    def _ola_eta(self) -> int:
+        minutes = self.rng.randint(3, 15)
+        return minutes * 60 if self.args.ola_eta_unit == "seconds" else minutes
+
+    async def ola_estimates(self, request):
+        def body():
+            return {"rides": [
+                {
+                    "category": OLA_CATEGORIES[i % len(OLA_CATEGORIES)],
+                    "amount": self.rng.randrange(40, 300, 5),
+                    "eta": self._ola_eta(),
+                    "rating": round(self.rng.uniform(4.2, 4.9), 1)
+                } for i in range(self.args.rides)
+            ]}
+
+        return await self.respond("ola", "ola.estimates", body)
+
+    async def ola_request(self, request):
+        def body():
+            return {
+                "ride_request_id": f"OLA-{self.rng.randrange(10**8):08d}",
+                "driver": {"name": "Standin Driver", "phone": "0000000000"},
+                "eta": self._ola_eta(),
+                "estimated_fare": self.rng.randrange(60, 300, 5),
+                "vehicle": {"model": "Dzire", "license_plate": "TN00AA0000"},
+                "pickup_address": "Stand-in pickup",
+                "drop_address": "Stand-in drop"
+            }
+
+        return await self.respond("ola", "ola.request", body)
+
+    # ----- Uber -----
+
+    async def uber_estimates(self, request):
+        def body():
+            prices = []
+            for i in range(self.args.rides):
+                low = self.rng.randint(1, 4)
+                prices.append({
+                    "display_name": UBER_PRODUCTS[i % len(UBER_PRODUCTS)],
+                    # Dollar range, as travel_service_mock converts the low end at 80 INR/USD
+                    "estimate": f"${low}-{low + self.rng.randint(1, 2)}",
+                    "duration": self.rng.randint(5, 20) * 60
+                })
+            return {"prices": prices}
+
+        return await self.respond("uber", "uber.estimates", body)
+
+    async def uber_request(self, request):
+        def body():
+            return {
+                "request_id": f"UBER-{self.rng.randrange(10**8):08d}",
+                "status": "processing",
+                "driver": None,
+                "eta": self.rng.randint(3, 12),
+                "vehicle": None,
+                "surge_multiplier": 1.0,
+                "price": {"display": f"₹{self.rng.randrange(80, 350, 5)}"}
+            }
+
+        return await self.respond("uber", "uber.request", body, ok_status=202)
+
+    # ----- Introspection -----
+
+    async def stats(self, request):
+        routes = {}
+        for route, samples in self.latencies.items():
+            ordered = sorted(samples)
+
+            def pct(p):
+                return round(ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))], 1)
+
+            routes[route] = {
+                "requests": len(ordered),
+                "p50_ms": pct(50), "p90_ms": pct(90), "p99_ms": pct(99),
+                "statuses": dict(self.statuses[route])
+            }
+        profiles = {
+            name: {"p50_ms": p.p50_ms, "p99_ms": p.p99_ms, "error_rate": p.error_rate}
+            for name, p in self.profiles.items()
+        }
+        return web.json_response({"profiles": profiles, "routes": routes})
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_get("/api/v2.1/search", self.zomato_search)
+        app.router.add_get("/api/v2.1/cities", self.zomato_cities)
+        app.router.add_post("/v1/rides/estimates", self.ola_estimates)
+        app.router.add_post("/v1/rides/request", self.ola_request)
+        app.router.add_get("/v1.2/estimates/price", self.uber_estimates)
+        app.router.add_post("/v1.2/requests", self.uber_request)
+        app.router.add_get("/_standin/stats", self.stats)
+        return app
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Local stand-in for the Zomato, Ola and Uber APIs")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--seed", type=int, default=None, help="seed for reproducible latency and errors")
+    parser.add_argument("--p50-ms", type=float, default=120.0, help="median response latency")
+    parser.add_argument("--p99-ms", type=float, default=1200.0, help="99th percentile response latency")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of 5xx responses")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="fraction of 429 responses")
+    parser.add_argument("--hang-rate", type=float, default=0.0, help="fraction of requests that stall for --hang-seconds")
+    parser.add_argument("--hang-seconds", type=float, default=30.0)
+    parser.add_argument("--profile", action="append", metavar="PROVIDER=P50,P99,ERROR_RATE",
+                        help="per-provider override, e.g. ola=300,4000,0.1 (repeatable)")
+    parser.add_argument("--restaurants", type=int, default=5, help="restaurants per Zomato search")
+    parser.add_argument("--rides", type=int, default=5, help="ride categories per Ola/Uber estimate")
+    parser.add_argument("--padding-bytes", type=int, default=0, help="extra bytes added to every success body")
+    parser.add_argument("--ola-eta-unit", choices=("minutes", "seconds"), default="minutes",
+                        help="unit of Ola's eta field (travel_service_mock reads minutes, "
+                             "ola_uber_integration divides by 60)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    standin = StandIn(args)
+    print(f"Provider stand-in on http://{args.host}:{args.port}")
+    for name, p in standin.profiles.items():
+        print(f"  {name}: p50={p.p50_ms}ms p99={p.p99_ms}ms errors={p.error_rate:.0%}")
+    web.run_app(standin.app(), host=args.host, port=args.port, print=None)
+
+
+if __name__ == "__main__":
+    main()